@@ -0,0 +1,62 @@
+"""
+Compara split_column sobre la escritura por columnas (write_columns) con la implementacion
+anterior, que creaba cada columna por separado y escribia celda a celda con __setitem__.
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/bench_columns.py [--rows 100000] [--parts 8]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+from excel_normalizer import SheetNormalizer
+
+
+def legacy_split_column(sheet: SheetNormalizer, source_col: str, new_cols: list, delimiter: str, start_row: int = 2):
+    for name in new_cols:
+        sheet[sheet.max_column + 1, 1] = name
+        sheet.recalculate_max_column()
+        sheet.recalculate_header_map()
+    for row in range(start_row, sheet.max_row + 1):
+        value = sheet[source_col, row]
+        if value is None:
+            continue
+        parts = str(value).split(delimiter, len(new_cols) - 1)
+        for i, col_name in enumerate(new_cols):
+            sheet[col_name, row] = parts[i] if i < len(parts) else None
+
+
+def build_sheet(rows: int, parts: int) -> SheetNormalizer:
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Id", "Source"])
+    for i in range(rows):
+        ws.append([i, " ".join(f"p{j}_{i % 97}" for j in range(parts))])
+    return SheetNormalizer(ws, None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--parts", type=int, default=8)
+    args = parser.parse_args()
+    new_cols = [f"Part {j}" for j in range(args.parts)]
+
+    results = {}
+    for name, split in (("legacy", legacy_split_column), ("write_columns", SheetNormalizer.split_column)):
+        sheet = build_sheet(args.rows, args.parts)
+        start = time.perf_counter()
+        split(sheet, "Source", new_cols, " ")
+        results[name] = time.perf_counter() - start
+        assert sheet[new_cols[-1], args.rows + 1] == f"p{args.parts - 1}_{(args.rows - 1) % 97}"
+        print(f"{name:<14} {results[name]:8.2f} s")
+    print(f"speedup        {results['legacy'] / results['write_columns']:8.2f}x "
+          f"({args.rows} rows x {args.parts} columns)")
+
+
+if __name__ == "__main__":
+    main()
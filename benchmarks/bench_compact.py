@@ -0,0 +1,103 @@
+"""
+Compara de punta a punta (abrir el archivo, normalize_columns sobre columnas categoricas y guardar)
+el modelo de celdas de openpyxl contra las columnas compactas:
+    cells         BookNormalizer(archivo)
+    load_compact  BookNormalizer(archivo) y luego load_compact: las columnas conviven con las celdas
+    stream        BookNormalizer(archivo, compact=True): lectura read_only directo a columnas
+                  compactas y escritura write_only, sin objetos Cell para los datos
+
+Cada camino corre en un proceso aparte, para que la memoria maxima (RSS) de uno no afecte al otro.
+
+Uso (desde la raiz del repositorio, solo Unix por el modulo resource):
+    python benchmarks/bench_compact.py [--rows 200000]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from excel_normalizer import BookNormalizer
+from text_normalizer import Normalizer
+
+COLUMNS = ("Region", "Comuna", "Estado")
+PATHS = ("cells", "load_compact", "stream")
+
+
+def build_file(file_name: str, rows: int) -> None:
+    from openpyxl import Workbook
+    rnd = random.Random(0)
+    vocab = {
+        "Region": [f"region  {i}" for i in range(16)],
+        "Comuna": [f"comuna de la  ciudad {i}" for i in range(346)],
+        "Estado": ["activo", "inactivo", "pendiente", "  Suspendido"],
+    }
+    # write_only para que armar el archivo no pese en la medicion
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Datos")
+    ws.append(COLUMNS)
+    for _ in range(rows):
+        ws.append([rnd.choice(vocab[col]) for col in COLUMNS])
+    wb.save(file_name)
+
+
+def max_rss_mib() -> float:
+    # ru_maxrss esta en KiB en Linux y en bytes en macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def run_path(path: str, file_name: str, output: str) -> dict:
+    """Corre un camino completo y retorna sus tiempos por etapa y la memoria maxima del proceso."""
+    normalizer = Normalizer()
+    timings = {}
+    start_rss = max_rss_mib()
+
+    def timed(label, func):
+        start = time.perf_counter()
+        result = func()
+        timings[label] = time.perf_counter() - start
+        return result
+
+    book = timed("load", lambda: BookNormalizer(file_name, compact=path == "stream"))
+    if path == "load_compact":
+        timed("load_compact", lambda: book.load_compact(*COLUMNS))
+    timed("normalize_columns", lambda: book.normalize_columns(list(COLUMNS), normalizer))
+    timed("save", lambda: book.save(output))
+    return {"timings": timings, "rss_start": start_rss, "rss_peak": max_rss_mib()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--path", choices=PATHS, help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.path:
+        print(json.dumps(run_path(args.path, args.file, args.output)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, "input.xlsx")
+        build_file(file_name, args.rows)
+        print(f"{args.rows} rows x {len(COLUMNS)} columns")
+        for path in PATHS:
+            output = os.path.join(directory, f"{path}.xlsx")
+            command = [sys.executable, __file__, "--path", path, "--file", file_name, "--output", output]
+            result = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+            total = sum(result["timings"].values())
+            stages = ", ".join(f"{label} {seconds:.2f} s" for label, seconds in result["timings"].items())
+            print(f"{path:<13} total {total:7.2f} s  ({stages})")
+            print(f"{'':<13} peak RSS {result['rss_peak']:8.1f} MiB (at start {result['rss_start']:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Presupuesto de tiempo de importacion de cada modulo, medido con `python -X importtime`.
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/import_time.py [--runs 5]
+
+Falla (codigo de salida 1) si algun modulo supera su presupuesto o si al importarlo se cargan
+dependencias pesadas que deberian importarse de forma perezosa.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tiempo acumulado maximo en milisegundos (el mejor de varias corridas)
+BUDGETS_MS = {
+    "text_normalizer": 50,
+    "norm_utils": 50,
+    "excel_normalizer": 100,
+}
+
+# Modulos que no se deben cargar solo por importar los nuestros
+HEAVY_MODULES = ("openpyxl", "email_validator", "dns", "idna")
+
+
+def import_time_ms(module: str) -> float:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"; el modulo pedido no tiene sangria
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].rstrip() == f" {module}":
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No import time found for {module}")
+
+
+def heavy_imports(module: str) -> list:
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in BUDGETS_MS.items():
+        best = min(import_time_ms(module) for _ in range(args.runs))
+        heavy = heavy_imports(module)
+        ok = best <= budget and not heavy
+        failed = failed or not ok
+        extra = f" loads {', '.join(heavy)}" if heavy else ""
+        print(f"{'OK  ' if ok else 'FAIL'} {module:<18} {best:7.1f} ms (budget {budget} ms){extra}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
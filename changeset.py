@@ -0,0 +1,77 @@
+import pickle
+from typing import Any, Iterable, Iterator, List, NamedTuple
+
+# Registro compacto de cambios sobre celdas. Las operaciones de SheetNormalizer en modo dry-run
+# anotan aqui lo que harian en vez de modificar el libro, para revisarlo o aplicarlo despues.
+
+# Cantidad de cambios que se acumulan antes de escribirlos al archivo
+_WRITE_BATCH = 10_000
+
+
+class Change(NamedTuple):
+    sheet: str
+    cell: str
+    old: Any
+    new: Any
+    flag: str | None = None
+    comment: str | None = None
+
+
+class ChangeSet:
+    """
+    Conjunto ordenado de cambios. Si se entrega file, los cambios se van escribiendo a ese archivo
+    (pickle por lotes) en vez de mantenerse en memoria, y se pueden recuperar con ChangeSet.load.
+    """
+
+    def __init__(self, file: str = None):
+        self.file = file
+        self._changes: List[Change] = []
+        self._count = 0
+        if file:
+            # Se trunca el archivo para empezar un registro nuevo
+            open(file, "wb").close()
+
+    def record(self, sheet: str, cell: str, old: Any, new: Any, flag: str = None, comment: str = None) -> None:
+        self._changes.append(Change(sheet, cell, old, new, flag, comment))
+        self._count += 1
+        if self.file and len(self._changes) >= _WRITE_BATCH:
+            self.flush()
+
+    def extend(self, changes: Iterable[Change]) -> None:
+        """Agrega los cambios de otro ChangeSet (por ejemplo uno calculado en otro proceso)."""
+        for change in changes:
+            self.record(*change)
+
+    def flush(self) -> None:
+        if not self.file or not self._changes:
+            return
+        with open(self.file, "ab") as file:
+            pickle.dump(self._changes, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._changes = []
+
+    def __iter__(self) -> Iterator[Change]:
+        if self.file:
+            self.flush()
+            yield from ChangeSet._read(self.file)
+        else:
+            yield from self._changes
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _read(file_name: str) -> Iterator[Change]:
+        with open(file_name, "rb") as file:
+            while True:
+                try:
+                    batch = pickle.load(file)
+                except EOFError:
+                    break
+                yield from (Change(*change) for change in batch)
+
+    @classmethod
+    def load(cls, file: str) -> "ChangeSet":
+        """Carga en memoria un registro escrito por un ChangeSet con archivo."""
+        changes = cls()
+        changes.extend(cls._read(file))
+        return changes
@@ -0,0 +1,135 @@
+import gzip
+import hashlib
+import json
+import os
+import pickle
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Checkpoints de trabajos largos sobre un libro. Despues de cada paso se guardan solo las columnas
+# que cambiaron (valores, rellenos y comentarios) en un pickle comprimido, sin guardar el xlsx.
+# Al reanudar se carga el libro original y se aplican los checkpoints en orden.
+
+MANIFEST = "manifest.json"
+
+# Estado de una columna: valores desde la fila 1 y anotaciones {fila: (color de relleno, comentario)}
+ColumnState = Tuple[Tuple[Any, ...], Dict[int, Tuple[str | None, str | None]]]
+
+
+def capture_columns(ws) -> Dict[int, ColumnState]:
+    """Lee el estado de todas las columnas de una hoja, indexadas desde 1."""
+    columns = {}
+    if ws.max_row == 1 and ws.max_column == 1 and ws.cell(row=1, column=1).value is None:
+        return columns
+    for idx, cells in enumerate(ws.iter_cols(min_row=1, max_row=ws.max_row, max_col=ws.max_column), start=1):
+        values = tuple(cell.value for cell in cells)
+        annotations = {}
+        for cell in cells:
+            fill = None
+            if cell.has_style and cell.fill.fill_type == "solid" and cell.fill.fgColor.type == "rgb":
+                fill = cell.fill.fgColor.rgb
+            comment = cell.comment.text if cell.comment else None
+            if fill or comment:
+                annotations[cell.row] = (fill, comment)
+        columns[idx] = (values, annotations)
+    return columns
+
+
+def column_digests(columns: Dict[int, ColumnState]) -> Dict[int, bytes]:
+    """
+    Huella del contenido de cada columna. Se usa pickle y no hash() ni ==, porque estos consideran
+    iguales valores distintos (-1 y -2 tienen el mismo hash, y 1 == 1.0 == True).
+    """
+    return {
+        idx: hashlib.blake2b(
+            pickle.dumps((values, sorted(annotations.items())), protocol=pickle.HIGHEST_PROTOCOL),
+            digest_size=16,
+        ).digest()
+        for idx, (values, annotations) in columns.items()
+    }
+
+
+def restore_columns(ws, columns: Dict[int, ColumnState], max_column: int) -> None:
+    """Escribe en la hoja el estado guardado de sus columnas y elimina las que ya no existian."""
+    from openpyxl.styles import PatternFill
+    from openpyxl.comments import Comment
+
+    fills = {}
+    for idx, (values, annotations) in columns.items():
+        for row, value in enumerate(values, start=1):
+            ws.cell(row=row, column=idx).value = value
+        for row in range(len(values) + 1, ws.max_row + 1):
+            ws.cell(row=row, column=idx).value = None
+        for row, (fill, comment) in annotations.items():
+            cell = ws.cell(row=row, column=idx)
+            if fill:
+                if fill not in fills:
+                    fills[fill] = PatternFill(fill_type="solid", fgColor=fill)
+                cell.fill = fills[fill]
+            if comment:
+                cell.comment = Comment(comment, "normalizer")
+    if ws.max_column > max_column:
+        ws.delete_cols(max_column + 1, ws.max_column - max_column)
+
+
+class CheckpointStore:
+    """
+    Carpeta de checkpoints de un libro. El manifiesto registra los pasos completados y la firma
+    (tamaño y fecha) del archivo original; si el archivo cambia, los checkpoints se descartan.
+    """
+
+    def __init__(self, directory: str, source_file: str):
+        self.directory = directory
+        self.source_file = source_file
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    def _signature(self) -> Dict[str, Any]:
+        stat = os.stat(self.source_file)
+        return {"source": os.path.abspath(self.source_file), "size": stat.st_size, "mtime": stat.st_mtime}
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        path = os.path.join(self.directory, MANIFEST)
+        fresh = dict(self._signature(), steps=[])
+        if not os.path.exists(path):
+            return fresh
+        with open(path, encoding="utf-8") as file:
+            manifest = json.load(file)
+        if any(manifest.get(key) != value for key, value in self._signature().items()):
+            self.clear(manifest)
+            return fresh
+        return manifest
+
+    def _write_manifest(self) -> None:
+        path = os.path.join(self.directory, MANIFEST)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(self.manifest, file, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def clear(self, manifest: Dict[str, Any] = None) -> None:
+        for step in (manifest or self.manifest)["steps"]:
+            path = os.path.join(self.directory, step["file"])
+            if os.path.exists(path):
+                os.remove(path)
+        self.manifest = dict(self._signature(), steps=[])
+        self._write_manifest()
+
+    @property
+    def completed(self) -> List[str]:
+        return [step["name"] for step in self.manifest["steps"]]
+
+    def save(self, name: str, payload: Dict[str, Any]) -> None:
+        file_name = f"{len(self.manifest['steps']):03d}.pkl.gz"
+        path = os.path.join(self.directory, file_name)
+        with gzip.open(path + ".tmp", "wb", compresslevel=1) as file:
+            pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        # El manifiesto se escribe al final, para que un corte a medias no deje un paso incompleto
+        self.manifest["steps"].append({"name": name, "file": file_name})
+        self._write_manifest()
+
+    def load(self) -> Iterator[Dict[str, Any]]:
+        """Entrega los checkpoints guardados, en orden, de a uno."""
+        for step in self.manifest["steps"]:
+            with gzip.open(os.path.join(self.directory, step["file"]), "rb") as file:
+                yield pickle.load(file)
@@ -0,0 +1,199 @@
+from array import array
+from numbers import Real
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+# Representacion compacta de columnas para operar sobre ellas sin recorrer los objetos Cell de openpyxl.
+# Las columnas de texto repetitivo se guardan codificadas con diccionario (un codigo por fila en un
+# array('I') y un vocabulario con cada valor distinto una sola vez), de modo que las operaciones se
+# aplican una vez por valor distinto. Las columnas numericas de alta cardinalidad se guardan en un
+# array('q') o array('d'). Se pueden construir desde una hoja ya cargada (y entonces conviven con sus
+# celdas) o directamente desde las filas de un libro abierto en modo read_only (ver encode_rows), sin
+# crear objetos Cell.
+
+
+class DictColumn:
+    """
+    Columna codificada con diccionario. codes[i] es el indice en vocab del valor de la fila
+    start_row + i. Ademas guarda anotaciones por fila (relleno y comentario) con la misma tecnica:
+    notes[i] es el indice en note_vocab, y 0 significa sin anotacion.
+    """
+
+    def __init__(self, codes: array, vocab: List[Any], start_row: int = 2):
+        self.codes = codes
+        self.vocab = vocab
+        self.start_row = start_row
+        self.notes: array | None = None
+        self.note_vocab: List[Tuple[str | None, str | None]] = [(None, None)]
+
+    @classmethod
+    def from_values(cls, values: Iterable[Hashable], start_row: int = 2) -> "DictColumn":
+        # La llave incluye el tipo para no confundir 1, 1.0 y True
+        index: Dict[Tuple[type, Any], int] = {}
+        vocab: List[Any] = []
+        codes = array("I")
+        for value in values:
+            key = (value.__class__, value)
+            code = index.get(key)
+            if code is None:
+                code = index[key] = len(vocab)
+                vocab.append(value)
+            codes.append(code)
+        return cls(codes, vocab, start_row)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self) -> Iterator:
+        vocab = self.vocab
+        return (vocab[code] for code in self.codes)
+
+    def __getitem__(self, idx: int) -> Any:
+        return self.vocab[self.codes[idx]]
+
+    def counts(self) -> List[int]:
+        """Cantidad de filas por codigo (los codigos que ya no se usan quedan en 0)."""
+        counts = [0] * len(self.vocab)
+        for code in self.codes:
+            counts[code] += 1
+        return counts
+
+    def remap(self, table: List[Any], first: int = 0) -> None:
+        """
+        Reemplaza el valor de cada codigo por table[codigo] desde la fila de indice first,
+        fusionando los valores que quedan iguales en un mismo codigo.
+        """
+        index: Dict[Tuple[type, Any], int] = {}
+        vocab: List[Any] = []
+        for value in (self.vocab if first else []) + list(table):
+            if index.setdefault((value.__class__, value), len(vocab)) == len(vocab):
+                vocab.append(value)
+        new = [index[(value.__class__, value)] for value in table]
+        codes = self.codes
+        if first:
+            old = [index[(value.__class__, value)] for value in self.vocab]
+            self.codes = array("I", (old[code] for code in codes[:first]))
+        else:
+            self.codes = array("I")
+        self.codes.extend(new[code] for code in codes[first:])
+        self.vocab = vocab
+
+    def annotate_codes(self, notes: Dict[int, Tuple[str | None, str | None]], first: int = 0) -> None:
+        """
+        Anota las filas desde first cuyo codigo aparece en notes (codigo -> (flag, comentario)).
+        Un flag o comentario nuevo reemplaza al anterior, igual que en la celda.
+        """
+        if not notes:
+            return
+        if self.notes is None:
+            self.notes = array("I", bytes(4 * len(self.codes)))
+        note_index = {note: code for code, note in enumerate(self.note_vocab)}
+        merged: Dict[Tuple[int, int], int] = {}
+        codes, row_notes = self.codes, self.notes
+        for idx in range(first, len(codes)):
+            code = codes[idx]
+            if code not in notes:
+                continue
+            key = (row_notes[idx], code)
+            note_code = merged.get(key)
+            if note_code is None:
+                old_flag, old_comment = self.note_vocab[key[0]]
+                flag, comment = notes[code]
+                note = (flag or old_flag, comment or old_comment)
+                note_code = note_index.get(note)
+                if note_code is None:
+                    note_code = note_index[note] = len(self.note_vocab)
+                    self.note_vocab.append(note)
+                merged[key] = note_code
+            row_notes[idx] = note_code
+
+    def note(self, idx: int) -> Tuple[str | None, str | None]:
+        return self.note_vocab[self.notes[idx]] if self.notes is not None else (None, None)
+
+
+class NumericColumn:
+    """Columna numerica en un array; las filas vacias se guardan aparte en nulls."""
+
+    def __init__(self, data: array, nulls: set, start_row: int = 2):
+        self.data = data
+        self.nulls = nulls
+        self.start_row = start_row
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> Iterator:
+        nulls = self.nulls
+        return (None if idx in nulls else value for idx, value in enumerate(self.data))
+
+    def __getitem__(self, idx: int) -> Any:
+        return None if idx in self.nulls else self.data[idx]
+
+    def note(self, idx: int) -> Tuple[str | None, str | None]:
+        return None, None
+
+    def to_dict_column(self) -> DictColumn:
+        return DictColumn.from_values(self, self.start_row)
+
+
+def encode_column(values: Iterable[Hashable], start_row: int = 2) -> DictColumn | NumericColumn:
+    """
+    Codifica una columna. Queda numerica si todos sus valores son numeros (o vacios) y mas de la
+    mitad de las filas tiene un valor distinto; en otro caso queda codificada con diccionario.
+    """
+    return _narrow(DictColumn.from_values(values, start_row))
+
+
+def encode_rows(rows: Iterable[Sequence], start_row: int = 2) -> List[DictColumn | NumericColumn]:
+    """
+    Codifica todas las columnas de un flujo de filas (por ejemplo iter_rows(values_only=True) de un
+    libro read_only) en una sola pasada, sin guardar las filas. Las filas pueden tener largos
+    distintos, y las filas vacias del final se descartan, igual que en SheetNormalizer.max_row.
+    """
+    indexes: List[Dict[Tuple[type, Any], int]] = []
+    vocabs: List[List[Any]] = []
+    codes: List[array] = []
+    count = last = 0
+    for row in rows:
+        while len(codes) < len(row):
+            # Columna nueva: las filas anteriores quedan vacias
+            indexes.append({(type(None), None): 0})
+            vocabs.append([None])
+            codes.append(array("I", bytes(4 * count)))
+        count += 1
+        empty = True
+        for idx in range(len(codes)):
+            value = row[idx] if idx < len(row) else None
+            if value is not None:
+                empty = False
+            key = (value.__class__, value)
+            code = indexes[idx].get(key)
+            if code is None:
+                code = indexes[idx][key] = len(vocabs[idx])
+                vocabs[idx].append(value)
+            codes[idx].append(code)
+        if not empty:
+            last = count
+    return [_narrow(DictColumn(column[:last], vocab, start_row)) for column, vocab in zip(codes, vocabs)]
+
+
+def _narrow(column: DictColumn) -> DictColumn | NumericColumn:
+    # Deja como NumericColumn las columnas numericas de alta cardinalidad (ver encode_column)
+    numbers = [v for v in column.vocab if v is not None]
+    if not numbers or len(column.vocab) * 2 <= len(column) \
+            or not all(isinstance(v, Real) and not isinstance(v, bool) for v in numbers):
+        return column
+    if all(isinstance(v, int) for v in numbers):
+        typecode = "q"
+    elif all(isinstance(v, float) for v in numbers):
+        typecode = "d"
+    else:
+        # Mezcla de enteros y decimales: un array('d') convertiria 1 en 1.0
+        return column
+    vocab = column.vocab
+    nulls = {idx for idx, code in enumerate(column.codes) if vocab[code] is None}
+    try:
+        data = array(typecode, (0 if vocab[code] is None else vocab[code] for code in column.codes))
+    except OverflowError:
+        # Enteros que no caben en 64 bits
+        return column
+    return NumericColumn(data, nulls, column.start_row)
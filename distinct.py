@@ -0,0 +1,111 @@
+import os
+import pickle
+from typing import Any, Hashable, Iterable, Iterator, List, Tuple
+
+# Este modulo entrega valores unicos de flujos muy grandes usando memoria acotada.
+# Mientras los valores distintos caben en memoria se entregan en orden de aparicion. Si se supera
+# el limite, lo ya visto y lo pendiente se reparte por hash en archivos temporales, y cada
+# particion se deduplica por separado al final.
+
+DEFAULT_MAX_IN_MEMORY = 1_000_000
+DEFAULT_PARTITIONS = 64
+# Cantidad de valores que se acumulan por particion antes de escribirlos a disco
+_WRITE_BATCH = 1_000
+# Profundidad maxima de reparticion, por si una particion no se achica (hashes repetidos)
+_MAX_DEPTH = 4
+
+
+class _Partitions:
+    """Archivos temporales donde se reparten pares (ya_entregado, valor) segun su hash."""
+
+    def __init__(self, directory: str, count: int, salt: int):
+        self.salt = salt
+        self.paths = [os.path.join(directory, f"part_{salt}_{i}.pkl") for i in range(count)]
+        self.files = [open(path, "wb") for path in self.paths]
+        self.buffers: List[List[Tuple[bool, Any]]] = [[] for _ in range(count)]
+
+    def add(self, emitted: bool, item: Hashable) -> None:
+        idx = hash((self.salt, item)) % len(self.files)
+        buffer = self.buffers[idx]
+        buffer.append((emitted, item))
+        if len(buffer) >= _WRITE_BATCH:
+            pickle.dump(buffer, self.files[idx], protocol=pickle.HIGHEST_PROTOCOL)
+            buffer.clear()
+
+    def close(self) -> None:
+        for buffer, file in zip(self.buffers, self.files):
+            if buffer:
+                pickle.dump(buffer, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.close()
+        self.buffers = []
+
+    def read(self, idx: int) -> Iterator[Tuple[bool, Any]]:
+        with open(self.paths[idx], "rb") as file:
+            while True:
+                try:
+                    yield from pickle.load(file)
+                except EOFError:
+                    break
+        os.remove(self.paths[idx])
+
+
+def _distinct(tagged: Iterable[Tuple[bool, Hashable]], max_in_memory: int, partitions: int,
+              directory: str, depth: int) -> Iterator:
+    # Los pares marcados como ya entregados siempre llegan antes que los pendientes, asi que
+    # basta con recordarlos para no volver a entregarlos.
+    seen = set()
+    spill = None
+    try:
+        for emitted, item in tagged:
+            if spill is None:
+                if item in seen:
+                    continue
+                seen.add(item)
+                if not emitted:
+                    yield item
+                if len(seen) > max_in_memory and depth < _MAX_DEPTH:
+                    spill = _Partitions(directory, partitions, depth)
+                    for old in seen:
+                        spill.add(True, old)
+                    seen.clear()
+            else:
+                # seen ahora solo evita escribir repetidos a disco; se vacia al llenarse
+                if item in seen:
+                    continue
+                if len(seen) >= max_in_memory:
+                    seen.clear()
+                seen.add(item)
+                spill.add(emitted, item)
+    finally:
+        if spill is not None:
+            spill.close()
+
+    if spill is None:
+        return
+    seen.clear()
+    for idx in range(len(spill.paths)):
+        yield from _distinct(spill.read(idx), max_in_memory, partitions, directory, depth + 1)
+
+
+def iter_distinct(
+        items: Iterable[Hashable],
+        max_in_memory: int = DEFAULT_MAX_IN_MEMORY,
+        partitions: int = DEFAULT_PARTITIONS,
+        temp_dir: str = None,
+) -> Iterator:
+    """
+    Entrega cada valor distinto de items una sola vez, con memoria acotada.
+    :param items: Valores hasheables (por ejemplo tuplas de una fila).
+    :param max_in_memory: Cantidad maxima de valores distintos que se mantienen en memoria
+    antes de derramar a disco.
+    :param partitions: Cantidad de archivos temporales en que se reparten los valores.
+    :param temp_dir: Carpeta para los archivos temporales (por defecto la del sistema).
+    Los primeros max_in_memory valores distintos se entregan en orden de aparicion; los demas
+    se entregan al final, agrupados por particion.
+    """
+    if max_in_memory < 1:
+        raise ValueError("max_in_memory must be at least 1")
+    import tempfile
+    with tempfile.TemporaryDirectory(prefix="distinct_", dir=temp_dir) as directory:
+        tagged = ((False, item) for item in items)
+        yield from _distinct(tagged, max_in_memory, partitions, directory, 0)
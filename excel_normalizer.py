@@ -1,23 +1,66 @@
 from __future__ import annotations
-from typing import List, Dict, Tuple, Iterable, Any, Callable
-import openpyxl
-from openpyxl import load_workbook, Workbook
-from openpyxl.utils import get_column_letter, column_index_from_string
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.cell.cell import Cell
-from openpyxl.styles import PatternFill, Font
-from openpyxl.comments import Comment
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import chain, islice, repeat
+from typing import List, Dict, Tuple, Iterable, Iterator, Sequence, Any, Callable, TYPE_CHECKING
 from text_normalizer import Normalizer
 from norm_utils import check_rut_normalize, validate_email_strict
+from distinct import iter_distinct, DEFAULT_MAX_IN_MEMORY
+from sketches import HyperLogLog, HeavyHitters
+from changeset import ChangeSet, Change
+from checkpoint import CheckpointStore, capture_columns, column_digests, restore_columns
+from compact_columns import DictColumn, NumericColumn, encode_column, encode_rows
+
+if TYPE_CHECKING:
+    from openpyxl import Workbook
+    from openpyxl.worksheet.worksheet import Worksheet
+    from openpyxl.cell.cell import Cell
+    from openpyxl.styles import PatternFill, Font
+
+# openpyxl se importa recien cuando se usa por primera vez (imports locales en los metodos que lo
+# necesitan), para que importar este modulo o los que dependen de el sea rapido.
+
+@dataclass
+class BatchResult:
+    """
+    Resultado opcional de las funciones de map_cols_batch y multimap_cols_batch. errors es una
+    mascara por fila: un valor verdadero marca la fila como invalida (si es texto o excepcion, se usa
+    como comentario) y la fila conserva su valor original.
+    """
+    columns: Any
+    errors: Sequence | None = None
+
+class _LazyStyle:
+    """Estilo de openpyxl como atributo de clase, construido en su primer acceso."""
+
+    def __init__(self, style: str, **kwargs):
+        self.style = style
+        self.kwargs = kwargs
+        self.value = None
+
+    def __get__(self, obj, owner):
+        if self.value is None:
+            import openpyxl.styles
+            self.value = getattr(openpyxl.styles, self.style)(**self.kwargs)
+        return self.value
 
 class SheetNormalizer:
-    FILL_NORMALIZED = PatternFill(fill_type="solid", fgColor="FFCCFFFF")
-    FILL_INVALID = PatternFill(fill_type="solid", fgColor="FFFF4444")
-    FILL_UNMAPPED = PatternFill(fill_type="solid", fgColor="FFFFBB99")
-    FILL_NOTFOUND = PatternFill(fill_type="solid", fgColor="FF6666FF")
-    FILL_TOOMANY = PatternFill(fill_type="solid", fgColor="FFFF8888")
-    FILL_DUPLICATE = PatternFill(fill_type="solid", fgColor="FFAAAA55")
-    FONT_BASE = Font(bold=False)
+    FILL_NORMALIZED = _LazyStyle("PatternFill", fill_type="solid", fgColor="FFCCFFFF")
+    FILL_INVALID = _LazyStyle("PatternFill", fill_type="solid", fgColor="FFFF4444")
+    FILL_UNMAPPED = _LazyStyle("PatternFill", fill_type="solid", fgColor="FFFFBB99")
+    FILL_NOTFOUND = _LazyStyle("PatternFill", fill_type="solid", fgColor="FF6666FF")
+    FILL_TOOMANY = _LazyStyle("PatternFill", fill_type="solid", fgColor="FFFF8888")
+    FILL_DUPLICATE = _LazyStyle("PatternFill", fill_type="solid", fgColor="FFAAAA55")
+    FONT_BASE = _LazyStyle("Font", bold=False)
+    # Nombre con que se registra cada relleno en los ChangeSet del modo dry-run, y su atributo
+    FLAG_FILLS = {
+        "normalized": "FILL_NORMALIZED",
+        "invalid": "FILL_INVALID",
+        "unmapped": "FILL_UNMAPPED",
+        "notfound": "FILL_NOTFOUND",
+        "toomany": "FILL_TOOMANY",
+        "duplicate": "FILL_DUPLICATE",
+    }
 
     def __init__(self, worksheet: Worksheet, wb_normalizer: BookNormalizer):
         self.ws = worksheet
@@ -25,6 +68,11 @@ class SheetNormalizer:
         self._header_map = None
         self._max_column: int = None
         self.wb_normalizer = wb_normalizer
+        # Si no es None, las operaciones registran sus cambios aqui en vez de modificar la hoja
+        self.changes: ChangeSet | None = None
+        # Columnas cargadas en representacion compacta (ver load_compact) y sus valores originales
+        self.compact: Dict[str | int, DictColumn | NumericColumn] = {}
+        self._compact_base: Dict[str | int, DictColumn | NumericColumn | None] = {}
 
     def recalculate_header_map(self):
         self._header_map = {
@@ -43,6 +91,10 @@ class SheetNormalizer:
         max_row = self.ws.max_row
         while max_row > 0 and all(cell.value is None for cell in self.ws[max_row]):
             max_row -= 1
+        # Las columnas compactas leidas sin pasar por la hoja (ver BookNormalizer con compact=True)
+        # pueden tener mas filas que ella
+        for column in self.compact.values():
+            max_row = max(max_row, column.start_row + len(column) - 1)
         self._max_row = max_row
 
     @property
@@ -61,6 +113,7 @@ class SheetNormalizer:
         return self._max_column
 
     def header_map_cols(self, *cols) -> List[str]:
+        self._check_not_compact(cols or self.header_map)
         if cols:
             return [self.header_map[col] for col in cols]
         else:
@@ -68,17 +121,26 @@ class SheetNormalizer:
 
     def col_to_letter(self, col) -> str:
         if isinstance(col, int):
+            from openpyxl.utils import get_column_letter
             col_letter = get_column_letter(col)
         else:
             col_letter = self.header_map.get(str(col), str(col))
         return col_letter
 
+    def col_to_index(self, col) -> int:
+        if isinstance(col, int):
+            return col
+        from openpyxl.utils import column_index_from_string
+        return column_index_from_string(self.col_to_letter(col))
+
     def __getitem__(self, key):
         col, row = key
+        self._check_not_compact([col])
         return self.ws[f"{self.col_to_letter(col)}{row}"].value
 
     def __setitem__(self, key, value):
         col, row = key
+        self._check_not_compact([col])
         col_letter = self.col_to_letter(col)
         self.ws[f"{col_letter}{row}"].value = value
         if row == 1:
@@ -93,12 +155,57 @@ class SheetNormalizer:
         return tuple(self[col, row] for col in cols)
 
     def paint(self, col: str | int, row: int, pattern: PatternFill) -> None:
+        self._check_not_compact([col])
         self.ws[f"{self.col_to_letter(col)}{row}"].fill = pattern
 
     def comment_cell(self, col: str | int, row: int, comment: str):
+        from openpyxl.comments import Comment
+        self._check_not_compact([col])
         col = self.col_to_letter(col)
         self.ws[f"{col}{row}"].comment = Comment(comment, "normalizer")
 
+    def cell(self, col: str | int, row: int) -> Cell:
+        self._check_not_compact([col])
+        return self.ws.cell(row=row, column=self.col_to_index(col))
+
+    def record_change(self, cell: Cell, value, flag: str | None = None, comment: str | None = None) -> None:
+        """
+        Cambia el valor de una celda y la marca con el relleno de flag (ver FLAG_FILLS) y un comentario.
+        En modo dry-run solo registra el cambio en self.changes. Los cambios sin efecto se omiten.
+        """
+        old = cell.value
+        if value == old and type(value) is type(old) and not (flag or comment):
+            return
+        if self.changes is not None:
+            self.changes.record(self.ws.title, cell.coordinate, old, value, flag, comment)
+            return
+        SheetNormalizer.apply_change(cell, Change(self.ws.title, cell.coordinate, old, value, flag, comment))
+
+    @staticmethod
+    def apply_change(cell: Cell, change: Change) -> None:
+        if change.new != change.old or type(change.new) is not type(change.old):
+            cell.value = change.new
+        if change.flag:
+            cell.fill = getattr(SheetNormalizer, SheetNormalizer.FLAG_FILLS[change.flag])
+        if change.comment:
+            from openpyxl.comments import Comment
+            cell.comment = Comment(change.comment, "normalizer")
+
+    @contextmanager
+    def dry_run(self, file: str = None):
+        """
+        Dentro del bloque, normalize_columns, normalize_ruts, normalize_emails y map_with_dict no
+        modifican la hoja, sino que registran sus cambios en el ChangeSet entregado. Cada operacion
+        lee los valores originales de la hoja, sin ver los cambios registrados por las anteriores.
+        """
+        changes = ChangeSet(file)
+        previous, self.changes = self.changes, changes
+        try:
+            yield changes
+        finally:
+            self.changes = previous
+            changes.flush()
+
     @staticmethod
     def change_cell(cell: Cell, value, pattern: PatternFill | None = None, font: Font | None = None):
         cell.value = value
@@ -107,11 +214,149 @@ class SheetNormalizer:
         if font:
             cell.font = font
 
+    def load_compact(self, *cols: str, start_row: int = 2) -> None:
+        """
+        Carga columnas en representacion compacta (ver compact_columns): texto codificado con
+        diccionario y numeros en arrays. Mientras una columna esta cargada, find_uniques,
+        normalize_columns, normalize_ruts, map_with_dict y highlight_duplicates trabajan sobre los
+        codigos, procesando cada valor distinto una sola vez, e iter_records y get_columns (y lo
+        que se basa en ellos) leen los valores compactos. Los demas metodos que leen o escriben
+        celdas de esas columnas fallan con ValueError hasta llamar a flush_compact.
+        BookNormalizer.save y run_step escriben en la hoja las columnas pendientes antes de guardar.
+        Las columnas cargadas asi conviven con las celdas de la hoja; para no crear las celdas, se
+        abre el libro con BookNormalizer(..., compact=True).
+        """
+        for col in cols:
+            values = (value for value, in self.iter_records([col], as_tuples=True, start_row=start_row))
+            column = encode_column(values, start_row)
+            self.compact[col] = column
+            # remap reemplaza codes y vocab en vez de modificarlos, asi que basta con guardar las referencias
+            self._compact_base[col] = DictColumn(column.codes, column.vocab, start_row) \
+                if isinstance(column, DictColumn) else column
+
+    def _check_not_compact(self, cols: Iterable) -> None:
+        # Los valores de una columna compacta en la hoja quedan desactualizados hasta flush_compact, y
+        # lo que se escriba en ella se perderia al escribir la columna compacta
+        if not self.compact:
+            return
+        loaded = {self.col_to_index(col) for col in self.compact}
+        pending = [col for col in cols if self.col_to_index(col) in loaded]
+        if pending:
+            raise ValueError(f"Columns {pending} are loaded in compact form, call flush_compact first")
+
+    def _attach_compact(self, header: Sequence, columns: List[DictColumn | NumericColumn]) -> None:
+        # Columnas leidas sin pasar por la hoja (ver BookNormalizer con compact=True). Se registran con
+        # su nombre si este identifica la columna, o con su indice (una letra podria ser tambien un
+        # nombre), y sin base: la hoja esta vacia
+        names = [name for name in header if name is not None]
+        for idx, column in enumerate(columns, start=1):
+            name = header[idx - 1] if idx <= len(header) else None
+            if not (isinstance(name, str) and names.count(name) == 1):
+                name = idx
+            self.compact[name] = column
+            self._compact_base[name] = None
+        self.recalculate_max_row()
+
+    def _compact_by_index(self) -> Dict[int, DictColumn | NumericColumn]:
+        return {self.col_to_index(col): column for col, column in self.compact.items()}
+
+    def _iter_output_rows(self, target) -> Iterator[List]:
+        # Filas para una hoja write_only de openpyxl: las columnas compactas con sus anotaciones y
+        # las demas copiadas de la hoja con su relleno, fuente, formato y comentario
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.comments import Comment
+        compact = self._compact_by_index()
+        width = max([self.ws.max_column, *compact])
+        sheet_cols = [idx for idx in range(1, width + 1) if idx not in compact]
+        if sheet_cols:
+            first_col = sheet_cols[0]
+            sheet_rows = self.ws.iter_rows(min_row=1, max_row=self.max_row, min_col=first_col, max_col=sheet_cols[-1])
+        else:
+            first_col, sheet_rows = 1, repeat(())
+        for row, cells in zip(range(1, self.max_row + 1), sheet_rows):
+            values = []
+            for idx in range(1, width + 1):
+                column = compact.get(idx)
+                if column is None or row < column.start_row:
+                    cell = cells[idx - first_col] if column is None else self.ws.cell(row=row, column=idx)
+                    if not (cell.has_style or cell.comment):
+                        values.append(cell.value)
+                        continue
+                    out = WriteOnlyCell(target, cell.value)
+                    out.fill, out.font, out.number_format = cell.fill, cell.font, cell.number_format
+                    if cell.comment:
+                        out.comment = Comment(cell.comment.text, cell.comment.author)
+                    values.append(out)
+                    continue
+                i = row - column.start_row
+                if i >= len(column):
+                    values.append(None)
+                    continue
+                flag, comment = column.note(i)
+                if not (flag or comment):
+                    values.append(column[i])
+                    continue
+                out = WriteOnlyCell(target, column[i])
+                if flag:
+                    out.fill = getattr(SheetNormalizer, SheetNormalizer.FLAG_FILLS[flag])
+                if comment:
+                    out.comment = Comment(comment, "normalizer")
+                values.append(out)
+            yield values
+
+    def _compact_dict(self, col: str) -> DictColumn:
+        column = self.compact[col]
+        if isinstance(column, NumericColumn):
+            column = self.compact[col] = column.to_dict_column()
+        return column
+
+    def flush_compact(self, *cols: str) -> int:
+        """
+        Escribe en la hoja los valores y anotaciones que cambiaron en las columnas compactas (todas
+        si no se indican) y las descarga. Respeta el modo dry-run. Retorna la cantidad de celdas escritas.
+        """
+        count = 0
+        for col in cols or list(self.compact):
+            column = self.compact[col]
+            base = self._compact_base[col]
+            idx = self.col_to_index(col)
+            notes = column.notes if isinstance(column, DictColumn) else None
+            # Sin base, la columna no esta en la hoja y se escribe completa
+            pairs = zip(base, column) if base is not None else ((None, value) for value in column)
+            for i, (old, new) in enumerate(pairs):
+                flag, comment = column.note_vocab[notes[i]] if notes is not None else (None, None)
+                if old == new and type(old) is type(new) and not (flag or comment):
+                    continue
+                self.record_change(self.ws.cell(row=column.start_row + i, column=idx), new, flag, comment)
+                count += 1
+            # Se descarga solo despues de escribirla, para no perder los cambios si algo falla
+            del self.compact[col]
+            del self._compact_base[col]
+        self.recalculate_max_row()
+        return count
+
+    def _compact_first(self, col: str, start_row: int) -> int:
+        # Indice de la primera fila de la columna compacta desde la que aplica una operacion
+        return max(0, start_row - self.compact[col].start_row)
+
     def normalize_columns(self, columns: List[str], normalizer: Normalizer, start_row: int = 2) -> None:
         """
         Normaliza una lista de columnas de TEXTO en un Worksheet
         """
         for column in columns:
+            if column in self.compact:
+                compact = self._compact_dict(column)
+                table, notes = [], {}
+                for code, value in enumerate(compact.vocab):
+                    result = value if value is None else normalizer.normalize(str(value))
+                    if value != result:
+                        notes[code] = ("normalized", None)
+                    table.append(result or None if value != result else value)
+                first = self._compact_first(column, start_row)
+                compact.annotate_codes(notes, first)
+                compact.remap(table, first)
+                continue
+            self._check_not_compact([column])
             cells = self.ws[self.header_map[column]]
             for cell in cells:
                 if cell.row < start_row:
@@ -123,35 +368,132 @@ class SheetNormalizer:
                     result = normalizer.normalize(str(cell.value))
                     if cell.value != result:
                         # Cambia texto vacío a None
-                        SheetNormalizer.change_cell(cell, result or None, pattern=SheetNormalizer.FILL_NORMALIZED)
+                        self.record_change(cell, result or None, "normalized")
 
-    def find_uniques(self, column: str, exclude_empty: bool = True, sort: bool = False, start_row : int = 2) -> List:
+    def find_uniques(self, column: str, exclude_empty: bool = True, sort: bool = False, start_row : int = 2,
+                     max_in_memory: int = DEFAULT_MAX_IN_MEMORY) -> List:
         """
         Encuentra todos los valores unicos en una columna de valores y retorna una lista con ellos.
         La columna puede tener cualquier tipo de datos.
         """
-        cells = self.ws[self.header_map[column]]
-
-        values = {
-            cell.value for cell in cells
-            if cell.row >= start_row and not (exclude_empty and cell.value in (None, ""))
-        }
+        if column in self.compact and isinstance(self.compact[column], DictColumn):
+            compact = self.compact[column]
+            codes = set(compact.codes[self._compact_first(column, start_row):])
+            values = (compact.vocab[code] for code in sorted(codes))
+        elif column in self.compact:
+            values = islice(self.compact[column], self._compact_first(column, start_row), None)
+            values = iter_distinct(values, max_in_memory=max_in_memory)
+        else:
+            values = (value for value, in self.iter_records([column], as_tuples=True, start_row=start_row))
+            values = iter_distinct(values, max_in_memory=max_in_memory)
+        values = (value for value in values if not (exclude_empty and value in (None, "")))
         values = sorted(values) if sort else list(values)
         return values
 
-    def find_multicolumn_uniques(self, columns: Iterable[str], sort: bool = False, start_row: int = 2) -> List[Tuple]:
+    def iter_multicolumn_uniques(self, columns: Iterable[str], start_row: int = 2,
+                                 max_in_memory: int = DEFAULT_MAX_IN_MEMORY) -> Iterator[Tuple]:
+        """
+        Entrega de forma perezosa cada combinacion unica de valores de las columnas, usando
+        memoria acotada (ver distinct.iter_distinct). Los valores vacios se entregan como "".
+        """
+        rows = (
+            tuple(value or "" for value in row)
+            for row in self.iter_records(columns, as_tuples=True, start_row=start_row)
+        )
+        return iter_distinct(rows, max_in_memory=max_in_memory)
+
+    def find_multicolumn_uniques(self, columns: Iterable[str], sort: bool = False, start_row: int = 2,
+                                 max_in_memory: int = DEFAULT_MAX_IN_MEMORY) -> List[Tuple]:
         """
         Encuentra todos los valores unicos en una columna de valores y retorna una lista con ellos.
         La columna puede tener cualquier tipo de datos.
         """
-        values = set()
-        cols = self.header_map_cols(*columns)
-        for row in range(start_row, self.max_row + 1):
-            values.add(tuple(self.ws[f"{col}{row}"].value or "" for col in cols))
+        values = self.iter_multicolumn_uniques(columns, start_row, max_in_memory)
         values = sorted(values) if sort else list(values)
         return values
 
+    # Limites superiores de los tramos de largo que se reportan en profile
+    PROFILE_LENGTH_BUCKETS = (0, 5, 10, 20, 50, 100, 255)
+
+    def profile(self, columns: Iterable[str] = None, top_k: int = 10, start_row: int = 2,
+                json_file: str = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Perfila columnas en una sola pasada sobre la hoja y con memoria acotada: tasa de nulos,
+        cantidad aproximada de distintos (HyperLogLog), valores mas frecuentes (Misra-Gries),
+        distribucion de largos y proporcion de ruts y emails validos (solo formato, sin DNS).
+        Retorna un diccionario columna -> estadisticas que se puede guardar como JSON en json_file.
+        """
+        columns = list(columns) if columns else list(self.header_map.keys())
+        stats = [
+            {
+                "nulls": 0,
+                "distinct": HyperLogLog(),
+                "top": HeavyHitters(max(100, top_k * 10)),
+                "lengths": [0] * (len(self.PROFILE_LENGTH_BUCKETS) + 1),
+                "length_min": None,
+                "length_max": 0,
+                "length_sum": 0,
+                "ruts": 0,
+                "emails": 0,
+            }
+            for _ in columns
+        ]
+        rows = 0
+        for record in self.iter_records(columns, as_tuples=True, start_row=start_row):
+            rows += 1
+            for value, st in zip(record, stats):
+                if value is None or value == "":
+                    st["nulls"] += 1
+                    continue
+                st["distinct"].add(value)
+                st["top"].add(value)
+                text = str(value)
+                length = len(text)
+                st["lengths"][SheetNormalizer._length_bucket(length)] += 1
+                st["length_sum"] += length
+                st["length_max"] = max(st["length_max"], length)
+                st["length_min"] = length if st["length_min"] is None else min(st["length_min"], length)
+                if check_rut_normalize(text)[0]:
+                    st["ruts"] += 1
+                elif "@" in text and validate_email_strict(text, check_deliverability=False)[0]:
+                    st["emails"] += 1
+
+        report = {}
+        for column, st in zip(columns, stats):
+            filled = rows - st["nulls"]
+            labels, low = [], 0
+            for high in self.PROFILE_LENGTH_BUCKETS:
+                labels.append(f"{low}-{high}")
+                low = high + 1
+            labels.append(f">{self.PROFILE_LENGTH_BUCKETS[-1]}")
+            report[column] = {
+                "rows": rows,
+                "nulls": st["nulls"],
+                "null_rate": st["nulls"] / rows if rows else 0.0,
+                "distinct_approx": st["distinct"].count(),
+                "top_values": st["top"].top(top_k),
+                "length_min": st["length_min"],
+                "length_max": st["length_max"] if filled else None,
+                "length_mean": st["length_sum"] / filled if filled else None,
+                "length_histogram": {label: n for label, n in zip(labels, st["lengths"]) if n},
+                "valid_rut_rate": st["ruts"] / filled if filled else 0.0,
+                "valid_email_rate": st["emails"] / filled if filled else 0.0,
+            }
+        if json_file:
+            import json
+            with open(json_file, "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2, default=str)
+        return report
+
+    @staticmethod
+    def _length_bucket(length: int) -> int:
+        for idx, high in enumerate(SheetNormalizer.PROFILE_LENGTH_BUCKETS):
+            if length <= high:
+                return idx
+        return len(SheetNormalizer.PROFILE_LENGTH_BUCKETS)
+
     def highlight_invalid_ruts(self, column: str) -> int:
+        self._check_not_compact([column])
         cells = self.ws[self.header_map[column]]
         invalid_count = 0
         for cell in cells:
@@ -164,6 +506,30 @@ class SheetNormalizer:
         return invalid_count
 
     def normalize_ruts(self, column: str, norm_mode="standard", validation_mode="strict", start_row: int = 2) -> int:
+        if column in self.compact:
+            compact = self._compact_dict(column)
+            first = self._compact_first(column, start_row)
+            counts = [0] * len(compact.vocab)
+            for code in compact.codes[first:]:
+                counts[code] += 1
+            table, notes = list(compact.vocab), {}
+            for code, value in enumerate(compact.vocab):
+                if not counts[code]:
+                    continue
+                if value:
+                    valid, norm, msg = check_rut_normalize(str(value), norm_mode=norm_mode, validation_mode=validation_mode)
+                    if valid:
+                        if norm != value:
+                            table[code] = norm
+                            notes[code] = ("normalized", None)
+                    else:
+                        notes[code] = ("invalid", f"Rut invalido: {msg}")
+                else:
+                    notes[code] = ("invalid", f"Rut invalido: Campo nulo")
+            compact.annotate_codes(notes, first)
+            compact.remap(table, first)
+            return sum(counts[code] for code, (flag, _) in notes.items() if flag == "invalid")
+        self._check_not_compact([column])
         cells = self.ws[self.header_map[column]]
         invalid_count = 0
         for cell in cells:
@@ -173,35 +539,77 @@ class SheetNormalizer:
                 valid, norm, msg = check_rut_normalize(str(cell.value), norm_mode=norm_mode, validation_mode=validation_mode)
                 if valid:
                     if norm != cell.value:
-                        SheetNormalizer.change_cell(cell, norm, pattern=SheetNormalizer.FILL_NORMALIZED)
+                        self.record_change(cell, norm, "normalized")
                     continue
                 else:
-                    cell.fill = SheetNormalizer.FILL_INVALID
-                    cell.comment = Comment(f"Rut invalido: {msg}", "normalizer")
+                    self.record_change(cell, cell.value, "invalid", f"Rut invalido: {msg}")
                     invalid_count += 1
             else:
-                cell.fill = SheetNormalizer.FILL_INVALID
-                cell.comment = Comment(f"Rut invalido: Campo nulo", "normalizer")
+                self.record_change(cell, cell.value, "invalid", f"Rut invalido: Campo nulo")
                 invalid_count += 1
         return invalid_count
 
-    def write_values(self, values: Dict) -> None:
+    def write_columns(self, columns: Dict[str, Sequence], mode: str = "append", start_row: int = 2,
+                      at: str | int = None) -> None:
         """
-        Agrega todos los datos entregados como columnas.
+        Escribe varias columnas completas en una sola operacion, actualizando header, max_row y
+        max_column una sola vez al final.
+        :param columns: Diccionario nombre -> valores, que se escriben desde start_row.
+        :param mode:
+        "append" -> Agrega columnas nuevas al final del header (aunque el nombre ya exista).
+        "insert" -> Inserta columnas nuevas antes de la columna at (nombre, letra o indice),
+        desplazando las siguientes a la derecha.
+        "replace" -> Reemplaza los datos de columnas existentes. Las filas que sobran hasta
+        max_row quedan en None.
         """
-        col_idx = self.max_column + 1
-        for column_name, column_values in values.items():
-            col_letter = get_column_letter(col_idx)
-            self.ws[col_letter + "1"].value = column_name
-            row = 2
-            for value in column_values:
-                self.ws[col_letter + str(row)].value = value
-                row += 1
-            col_idx += 1
+        if mode not in ("append", "insert", "replace"):
+            raise ValueError(f"Invalid write mode: \"{mode}\"")
+        ws = self.ws
+        if mode == "replace":
+            self._check_not_compact(columns)
+            indexes = [self.col_to_index(name) for name in columns]
+        else:
+            if mode == "insert":
+                if at is None:
+                    raise ValueError("Insert mode needs a column to insert at")
+                first = self.col_to_index(at)
+                # Insertar desplazaria las columnas compactas que estan a la derecha
+                self._check_not_compact(range(first, self.max_column + 1))
+                ws.insert_cols(first, len(columns))
+            else:
+                first = self.max_column + 1
+            indexes = list(range(first, first + len(columns)))
+            if mode == "append":
+                # max_column solo cuenta headers no vacios, asi que puede caer sobre una columna compacta
+                self._check_not_compact(indexes)
+            for idx, name in zip(indexes, columns):
+                ws.cell(row=1, column=idx, value=name)
+
+        max_row = self.max_row
+        for idx, values in zip(indexes, columns.values()):
+            row = start_row
+            if mode == "replace":
+                for value in values:
+                    ws.cell(row=row, column=idx).value = value
+                    row += 1
+                for empty in range(row, max_row + 1):
+                    ws.cell(row=empty, column=idx).value = None
+            else:
+                # Las columnas nuevas estan vacias, asi que no se crean celdas para los None
+                for value in values:
+                    if value is not None:
+                        ws.cell(row=row, column=idx, value=value)
+                    row += 1
         self.recalculate_max_row()
         self.recalculate_header_map()
         self.recalculate_max_column()
 
+    def write_values(self, values: Dict) -> None:
+        """
+        Agrega todos los datos entregados como columnas.
+        """
+        self.write_columns(values, mode="append")
+
     def map_cols_unsafe(self, mapping_function, *cols) -> None:
         cols = self.header_map_cols(*cols)
         for col in cols:
@@ -210,6 +618,7 @@ class SheetNormalizer:
                 cell.value = mapping_function(cell.value)
 
     def map_cols_safe(self, mapping_function, *cols) -> None:
+        from openpyxl.comments import Comment
         cols = self.header_map_cols(*cols)
         for col in cols:
             for row in range(2, self.max_row + 1):
@@ -230,22 +639,236 @@ class SheetNormalizer:
             for i, col in enumerate(cols):
                 self[col,row] = new_data[i]
 
+    def map_cols_batch(self, batch_function: Callable[[Sequence], Sequence | BatchResult], *cols,
+                       as_arrays: bool = False) -> int:
+        """
+        Como map_cols_safe, pero batch_function recibe la columna completa (sin header) y retorna la
+        columna nueva, o un BatchResult con la columna y su mascara de errores. Con as_arrays=True
+        recibe arreglos de NumPy. Retorna la cantidad de celdas marcadas como invalidas.
+        """
+        invalid = 0
+        for idx in self._header_indexes(*cols):
+            values, inputs = self._batch_input([idx], as_arrays)
+            result = batch_function(inputs[0])
+            if isinstance(result, BatchResult):
+                new, errors = result.columns, result.errors
+            else:
+                new, errors = result, None
+            invalid += self._write_batch([idx], values, [new], errors)
+        return invalid
+
+    def multimap_cols_batch(self, batch_function: Callable[..., Sequence | BatchResult], *cols,
+                            as_arrays: bool = False) -> int:
+        """
+        Como multimap_cols_unsafe, pero batch_function recibe una secuencia completa por columna y
+        retorna una secuencia de columnas nuevas (en el mismo orden), o un BatchResult con ellas y
+        una mascara de errores por fila. Retorna la cantidad de filas marcadas como invalidas.
+        """
+        indexes = self._header_indexes(*cols)
+        values, inputs = self._batch_input(indexes, as_arrays)
+        result = batch_function(*inputs)
+        if isinstance(result, BatchResult):
+            new, errors = result.columns, result.errors
+        else:
+            new, errors = result, None
+        return self._write_batch(indexes, values, list(new), errors)
+
+    def _header_indexes(self, *cols) -> List[int]:
+        # Los nombres se resuelven una sola vez a indices: pasar letras a iter_records o
+        # write_columns las volveria a buscar como nombres de header ("A" puede ser otra columna)
+        from openpyxl.utils import column_index_from_string
+        return [column_index_from_string(letter) for letter in self.header_map_cols(*cols)]
+
+    def _batch_input(self, indexes: List[int], as_arrays: bool) -> Tuple[List[List], List]:
+        # Retorna las columnas originales y lo que recibe batch_function (las mismas listas o arreglos)
+        columns = [[] for _ in indexes]
+        for record in self.iter_records(indexes, as_tuples=True):
+            for column, value in zip(columns, record):
+                column.append(value)
+        if not as_arrays:
+            return columns, columns
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("as_arrays=True requires numpy") from None
+        return columns, [numpy.asarray(column, dtype=SheetNormalizer._array_dtype(column)) for column in columns]
+
+    @staticmethod
+    def _array_dtype(column: List) -> type | None:
+        # Solo una columna toda int o toda float usa un dtype numerico; con cualquier mezcla NumPy
+        # elegiria un dtype de texto (1 y 2.5 volverian como '1' y '2.5'), asi que se usa object
+        types = {value.__class__ for value in column}
+        return None if column and (types == {int} or types == {float}) else object
+
+    def _write_batch(self, indexes: List[int], old: List[List], new: List, errors: Sequence | None) -> int:
+        from openpyxl.comments import Comment
+        n = len(old[0]) if old else 0
+        if len(new) != len(indexes):
+            raise ValueError(f"Expected {len(indexes)} result columns, got {len(new)}")
+        new = [column.tolist() if hasattr(column, "tolist") else list(column) for column in new]
+        if any(len(column) != n for column in new):
+            raise ValueError(f"Result columns must have {n} values")
+        errors = errors.tolist() if hasattr(errors, "tolist") else errors
+        if errors is not None and len(errors) != n:
+            raise ValueError(f"Error mask must have {n} values")
+        failed = [idx for idx, error in enumerate(errors) if error] if errors is not None else []
+        for idx in failed:
+            # Las filas invalidas conservan el valor original tal cual, sin pasar por NumPy
+            for column, original in zip(new, old):
+                column[idx] = original[idx]
+
+        self.write_columns(dict(zip(indexes, new)), mode="replace")
+        fill = SheetNormalizer.FILL_INVALID
+        for idx in failed:
+            error = errors[idx]
+            comment = Comment(str(error), "normalizer") if isinstance(error, (str, Exception)) else None
+            for col_idx in indexes:
+                cell = self.ws.cell(row=idx + 2, column=col_idx)
+                cell.fill = fill
+                if comment:
+                    cell.comment = comment
+        return len(failed)
+
     def get_columns(self, *cols : str) -> Dict[str, List]:
-        data = {}
-        for col in cols:
-            data[col] = []
-            for row in range(2, self.max_row + 1):
-                data[col].append(self[col, row])
+        cols = list(dict.fromkeys(cols))
+        data = {col: [] for col in cols}
+        for record in self.iter_records(cols, as_tuples=True):
+            for col, value in zip(cols, record):
+                data[col].append(value)
         return data
 
+    def iter_records(
+            self,
+            cols: Iterable[str] = None,
+            normalizers: Dict[str, Normalizer | Callable[[Any], Any]] = None,
+            *,
+            as_tuples: bool = False,
+            chunk_size: int = 0,
+            start_row: int = 2,
+    ) -> Iterator:
+        """
+        Recorre las filas de la hoja de forma perezosa y entrega registros normalizados al vuelo,
+        sin construir las columnas completas en memoria.
+
+        :param cols: Columnas a leer (por defecto todas las del header).
+        :param normalizers: Diccionario columna -> Normalizer o funcion. Los Normalizer se aplican
+        igual que en normalize_columns (None se mantiene y los textos vacios pasan a None).
+        :param as_tuples: Entrega tuplas en el orden de cols en vez de diccionarios.
+        :param chunk_size: Si es mayor a 0, entrega listas de hasta chunk_size registros.
+        :param start_row: Primera fila de datos.
+        """
+        cols = list(cols) if cols else list(self.header_map.keys())
+        indexes = [self.col_to_index(col) for col in cols]
+        normalizers = normalizers or {}
+        funcs = [SheetNormalizer._record_normalizer(normalizers.get(col)) for col in cols]
+
+        compact = self._compact_by_index() if self.compact else {}
+        if any(idx in compact for idx in indexes):
+            # Las columnas compactas se leen de su representacion, y las demas de a una desde la hoja
+            rows = zip(*(self._column_values(idx, compact.get(idx), start_row) for idx in indexes))
+            indexes = list(range(len(indexes)))
+        else:
+            # Solo se leen las columnas entre la primera y la ultima pedida
+            min_col = min(indexes, default=1)
+            indexes = [idx - min_col for idx in indexes]
+            rows = self.ws.iter_rows(min_row=start_row, max_row=self.max_row, min_col=min_col,
+                                     max_col=min_col + max(indexes, default=0), values_only=True)
+
+        chunk = []
+        for row in rows:
+            values = tuple(
+                func(row[idx] if idx < len(row) else None) if func else (row[idx] if idx < len(row) else None)
+                for idx, func in zip(indexes, funcs)
+            )
+            record = values if as_tuples else dict(zip(cols, values))
+            if chunk_size <= 0:
+                yield record
+                continue
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _column_values(self, idx: int, column: DictColumn | NumericColumn | None, start_row: int) -> Iterator:
+        # Valores de una columna desde start_row hasta max_row; las filas antes del inicio de una
+        # columna compacta (el header) se leen de la hoja
+        count = max(0, self.max_row - start_row + 1)
+        first = column.start_row if column is not None else self.max_row + 1
+        sheet = (
+            value for value, in self.ws.iter_rows(min_row=start_row, max_row=min(first - 1, self.max_row),
+                                                  min_col=idx, max_col=idx, values_only=True)
+        )
+        if column is None:
+            return sheet
+        values = islice(column, max(0, start_row - first), None)
+        return islice(chain(sheet, values, repeat(None)), count)
+
+    @staticmethod
+    def _record_normalizer(normalizer: Normalizer | Callable[[Any], Any] | None) -> Callable[[Any], Any] | None:
+        if normalizer is None or not isinstance(normalizer, Normalizer):
+            return normalizer
+        # Mismo criterio que normalize_columns: None se mantiene y el texto vacio pasa a None
+        return lambda value: None if value is None else (normalizer.normalize(str(value)) or None)
+
+    def write_records(self, records: Iterable, cols: Sequence[str], start_row: int = 2, *,
+                      chunked: bool = False, append: bool = False) -> int:
+        """
+        Escribe un flujo de registros (diccionarios, o secuencias como tuplas y listas en el orden de
+        cols) en las columnas indicadas, a partir de start_row. Las columnas que no existan se crean
+        al final del header. Retorna la cantidad de filas escritas.
+        :param chunked: records entrega lotes de registros, como iter_records con chunk_size.
+        :param append: Crea siempre columnas nuevas al final del header, aunque el nombre ya
+        exista (igual que write_values).
+        """
+        if append:
+            first = self.max_column + 1
+            indexes = list(range(first, first + len(cols)))
+            self._check_not_compact(indexes)
+            for idx, name in zip(indexes, cols):
+                self.ws.cell(row=1, column=idx).value = name
+            self.recalculate_header_map()
+            self.recalculate_max_column()
+        else:
+            self._check_not_compact(cols)
+            missing = [col for col in cols if col not in self.header_map]
+            if missing:
+                self.write_columns({name: () for name in missing}, mode="append")
+            indexes = [self.col_to_index(self.header_map[col]) for col in cols]
+
+        if chunked:
+            records = (record for chunk in records for record in chunk)
+        row = start_row
+        for record in records:
+            values = (record.get(col) for col in cols) if isinstance(record, dict) else record
+            for idx, value in zip(indexes, values):
+                self.ws.cell(row=row, column=idx).value = value
+            row += 1
+        self.recalculate_max_row()
+        return row - start_row
+
     def map_with_dict(self, mapper: Dict, column: str, tgt_column: str):
         maps = mapper.keys()
         values = mapper.values()
+        if column in self.compact:
+            source = self._compact_dict(column)
+            if tgt_column not in self.compact:
+                self.load_compact(tgt_column, start_row=source.start_row)
+            target = self._compact_dict(tgt_column)
+            # El destino toma los codigos del origen y luego se reemplaza cada valor distinto
+            target.codes, target.vocab = source.codes, source.vocab
+            notes = {
+                code: ("unmapped", None) for code, value in enumerate(source.vocab)
+                if value not in maps and value not in values
+            }
+            target.annotate_codes(notes)
+            target.remap([mapper.get(value, value) for value in source.vocab])
+            return
         for r in range(2, self.max_row + 1):
             value = self[column, r]
-            self[tgt_column, r] = mapper.get(value, value)
-            if value not in maps and value not in values:
-                self.paint(tgt_column, r, self.FILL_UNMAPPED)
+            flag = "unmapped" if value not in maps and value not in values else None
+            self.record_change(self.cell(tgt_column, r), mapper.get(value, value), flag)
 
     def look_up(self, compare_value, lookup_cols: Iterable = None,  comparer: Callable[[Tuple, Any], bool] = None) -> List[Tuple]:
         comparer = comparer or (lambda x, y : x == y)
@@ -268,19 +891,31 @@ class SheetNormalizer:
         data = []
         for row in range(2, self.max_row + 1):
             data.append(self.get_row(row))
-        index_cols = [column_index_from_string(self.col_to_letter(col)) for col in cols]
+        index_cols = [self.col_to_index(col) for col in cols]
         # Ordenar por cada columna por separado
         for col in reversed(index_cols):
             data.sort(key = lambda x: (x[col-1] is not None, str(x[col-1]) if x[col-1] is not None else ""), reverse = False)
         self.overwrite_rows(*data)
 
     def create_column(self, name: str) -> None:
-        self[self.max_column + 1, 1] = name
-        self.recalculate_max_column()
-        self.recalculate_header_map()
+        self.write_columns({name: ()}, mode="append")
 
     def highlight_duplicates(self, column):
         """Destaca todos los valores duplicados en una columna especificada"""
+        if column in self.compact:
+            compact = self._compact_dict(column)
+            # Los codigos distinguen el tipo, pero los duplicados se comparan con == igual que en
+            # la hoja (1, 1.0 y True son el mismo valor), asi que se agrupan los codigos iguales
+            first_code: Dict[Any, int] = {}
+            group = [first_code.setdefault(value, code) for code, value in enumerate(compact.vocab)]
+            rows: Dict[int, List[int]] = {}
+            for idx, code in enumerate(compact.codes):
+                rows.setdefault(group[code], []).append(compact.start_row + idx)
+            compact.annotate_codes({
+                code: ("duplicate", f"Valor duplicado en {rows[group[code]]}")
+                for code in range(len(compact.vocab)) if len(rows.get(group[code], ())) > 1
+            })
+            return
         data = {}
         for row in range(2, self.max_row + 1):
             value = self[column, row]
@@ -295,18 +930,18 @@ class SheetNormalizer:
     def normalize_emails(self, column: str, normalizer: Normalizer = None):
         """Normaliza todos los emails de una columna"""
         for row in range(2, self.max_row + 1):
-            value = self[column, row]
+            cell = self.cell(column, row)
+            value = cell.value
             if value and normalizer:
                 value = normalizer.normalize(value)
             if value:
-                self[column, row] = value
                 valid, msg = validate_email_strict(value)
-                if not valid:
-                    self.paint(column, row, self.FILL_INVALID)
-                    self.comment_cell(column, row, msg)
+                if valid:
+                    self.record_change(cell, value)
+                else:
+                    self.record_change(cell, value, "invalid", msg)
             else:
-                self.paint(column, row, self.FILL_INVALID)
-                self.comment_cell(column, row, "Campo vacío")
+                self.record_change(cell, cell.value, "invalid", "Campo vacío")
 
     def split_column(self, source_col: str, new_cols: list[str], delimiter: str, start_row: int = 2):
         """
@@ -315,35 +950,101 @@ class SheetNormalizer:
         Example:
             split_column("Full Name", ["First", "Middle", "Last", "Suffix"], " ")
         """
-        # Ensure new columns exist
-        for name in new_cols:
-            self.create_column(name)
+        n = len(new_cols)
+        split = [[] for _ in new_cols]
+        for value, in self.iter_records([source_col], as_tuples=True, start_row=start_row):
+            parts = () if value is None else str(value).split(delimiter, n - 1)
+            for i, column in enumerate(split):
+                column.append(parts[i] if i < len(parts) else None)
 
-        for row in range(start_row, self.max_row + 1):
-            value = self[source_col, row]
-            if value is None:
-                continue
-            parts = str(value).split(delimiter, len(new_cols) - 1)
-            for i, col_name in enumerate(new_cols):
-                self[col_name, row] = parts[i] if i < len(parts) else None
+        # Create all new columns and write their data in one go
+        self.write_columns(dict(zip(new_cols, split)), mode="append", start_row=start_row)
 
     def copy_column(self, source_col: str, new_col: str):
-        # Create new column with given name
-        self.create_column(new_col)
-        tgt_letter = self.header_map[new_col]
-        src_letter = self.header_map[source_col]
-
-        for row in range(2, self.max_row + 1):
-            value = self.ws[f"{src_letter}{row}"].value
-            self.ws[f"{tgt_letter}{row}"].value = value
+        # Create new column with given name and the source values
+        values = (value for value, in self.iter_records([source_col], as_tuples=True))
+        self.write_columns({new_col: list(values)}, mode="append")
 
 class BookNormalizer:
-    def __init__(self, file_name: str):
-        self.wb: Workbook = load_workbook(file_name)
-        self.ws_norms = {sheet: SheetNormalizer(self.wb[sheet], self) for sheet in self.wb.sheetnames}
+    def __init__(self, file_name: str, checkpoint_dir: str = None, compact: bool = False):
+        """
+        :param checkpoint_dir: Carpeta de checkpoints por paso (ver run_step).
+        :param compact: Lee el libro en modo read_only directo a columnas compactas (ver
+        SheetNormalizer.load_compact), sin crear objetos Cell para los datos, y save lo escribe en
+        modo write_only. Solo se conservan los valores: el formato original no se copia.
+        """
+        from openpyxl import load_workbook
+        if compact and checkpoint_dir:
+            raise ValueError("checkpoint_dir cannot be used with compact=True")
+        # Libro leido directo a columnas compactas (compact=True)
+        self.streamed = compact
+        if compact:
+            self._load_streamed(file_name)
+        else:
+            self.wb: Workbook = load_workbook(file_name)
+            self.ws_norms = {sheet: SheetNormalizer(self.wb[sheet], self) for sheet in self.wb.sheetnames}
         self.current_norm = self.ws_norms[self.wb.sheetnames[0]]
         self.mappings : Dict[str, Dict] = {}
         self.file_name = file_name
+        # Checkpoints por paso (ver run_step)
+        self.checkpoints = CheckpointStore(checkpoint_dir, file_name) if checkpoint_dir else None
+        self._digests: Dict[str, Dict[int, bytes]] | None = None
+        if self.checkpoints:
+            for payload in self.checkpoints.load():
+                self._restore_checkpoint(payload)
+
+    def run_step(self, name: str, step: Callable[..., Any], *args, **kwargs) -> bool:
+        """
+        Ejecuta step(*args, **kwargs) como un paso con nombre de un trabajo largo. Si el libro se
+        abrio con checkpoint_dir, al terminar el paso se guardan las columnas que cambiaron y, al
+        volver a correr el trabajo, los pasos ya completados se saltan y su resultado se restaura
+        desde los checkpoints. Retorna False si el paso se salto.
+        """
+        if not self.checkpoints:
+            step(*args, **kwargs)
+            return True
+        if name in self.checkpoints.completed:
+            return False
+        self._flush_compact()
+        if self._digests is None:
+            self._digests = {title: column_digests(capture_columns(self.wb[title])) for title in self.wb.sheetnames}
+        step(*args, **kwargs)
+        self._flush_compact()
+
+        changed = {}
+        digests = {}
+        max_columns = {}
+        for title in self.wb.sheetnames:
+            columns = capture_columns(self.wb[title])
+            digests[title] = column_digests(columns)
+            max_columns[title] = len(columns)
+            previous = self._digests.get(title, {})
+            changed[title] = {idx: state for idx, state in columns.items() if previous.get(idx) != digests[title][idx]}
+        self.checkpoints.save(name, {
+            "step": name,
+            "sheets": list(self.wb.sheetnames),
+            "columns": changed,
+            "max_columns": max_columns,
+            "mappings": self.mappings,
+            "current": self.current_norm.ws.title,
+        })
+        self._digests = digests
+        return True
+
+    def _restore_checkpoint(self, payload: Dict[str, Any]) -> None:
+        for title in payload["sheets"]:
+            if title not in self.ws_norms:
+                self.create_sheet(title)
+        self.keep_sheets(payload["sheets"])
+        self.ws_norms = {title: norm for title, norm in self.ws_norms.items() if title in payload["sheets"]}
+        for title, columns in payload["columns"].items():
+            restore_columns(self.wb[title], columns, payload["max_columns"][title])
+        for norm in self.ws_norms.values():
+            norm.recalculate_header_map()
+            norm.recalculate_max_row()
+            norm.recalculate_max_column()
+        self.mappings = payload["mappings"]
+        self.current_norm = self.ws_norms[payload["current"]]
 
     def keep_sheets(self, sheets: Iterable | None = None) -> None:
         sheets = sheets or self.wb.sheetnames
@@ -352,9 +1053,49 @@ class BookNormalizer:
             if sheet not in sheets:
                 del self.wb[sheet]
 
+    def _flush_compact(self) -> None:
+        # Escribe en las hojas las columnas compactas pendientes (ver SheetNormalizer.load_compact)
+        for norm in self.ws_norms.values():
+            if norm.compact:
+                norm.flush_compact()
+
+    def _load_streamed(self, file_name: str) -> None:
+        from openpyxl import Workbook, load_workbook
+        source = load_workbook(file_name, read_only=True)
+        self.wb = Workbook()
+        self.wb.remove(self.wb.active)
+        self.ws_norms = {}
+        try:
+            for title in source.sheetnames:
+                rows = source[title].iter_rows(values_only=True)
+                header = next(rows, ())
+                # La hoja queda solo con el header; los datos viven en las columnas compactas
+                ws = self.wb.create_sheet(title)
+                for idx, name in enumerate(header, start=1):
+                    if name is not None:
+                        ws.cell(row=1, column=idx).value = name
+                self.ws_norms[title] = SheetNormalizer(ws, self)
+                self.ws_norms[title]._attach_compact(header, encode_rows(rows))
+        finally:
+            source.close()
+
     def save(self, file_name: str) -> None:
+        if self.streamed:
+            self._save_streamed(file_name)
+            return
+        self._flush_compact()
         self.wb.save(file_name)
 
+    def _save_streamed(self, file_name: str) -> None:
+        # Las columnas compactas se escriben fila a fila, sin pasarlas a celdas de la hoja
+        from openpyxl import Workbook
+        out = Workbook(write_only=True)
+        for title in self.wb.sheetnames:
+            target = out.create_sheet(title)
+            for row in self.ws_norms[title]._iter_output_rows(target):
+                target.append(row)
+        out.save(file_name)
+
     def create_sheet(self, sheet_name: str) -> None:
         ws = self.wb.create_sheet(sheet_name)
         self.ws_norms[sheet_name] = SheetNormalizer(ws, self)
@@ -363,6 +1104,7 @@ class BookNormalizer:
         """
         Combina varias columnas en una sola que escribe en otra hoja.
         """
+        self.current_norm._check_not_compact(columns)
         cols = [self.header_map[col] for col in columns]
         max_row = self.max_row
         tgt_wsn = self.ws_norms[target_worksheet]
@@ -402,7 +1144,7 @@ class BookNormalizer:
         self.ws_norms[target_sheet].write_values(data)
 
     def save_sheets_to_file(self, file_name: str, *sheet_names: str,):
-        self.wb.save(file_name)
+        self.save(file_name)
         bn = BookNormalizer(file_name)
         bn.keep_sheets(sheet_names)
         bn.save(file_name)
@@ -417,6 +1159,7 @@ class BookNormalizer:
     def load_mapping(self, sheet : str, key_col: str, value_col: str, mapping_name: str = None, file: str = ""):
         close = False
         if (file or self.file_name) != self.file_name:
+            from openpyxl import load_workbook
             wb = load_workbook(file)
             ws = wb[sheet]
             normal = SheetNormalizer(ws, self)
@@ -446,23 +1189,24 @@ class BookNormalizer:
                    ):
         """TODO: Documentar porque es muy compleja de usar!"""
         lookup_norm = self.ws_norms[look_up_sheet]
+        norm = self.current_norm
         # Iterar sobre filas en columnas
-        for row in range(2, self.current_norm.max_row + 1):
-            row_data = (row,) + (self.current_norm.get_row(row, *mapping_cols))
+        for row in range(2, norm.max_row + 1):
+            row_data = (row,) + (norm.get_row(row, *mapping_cols))
             search_result = lookup_norm.look_up(row_data, lookup_cols, comparer)
+            flag, comment = None, None
             if not search_result:
                 for col in mapping_cols:
-                    self.current_norm.paint(col, row, self.current_norm.FILL_NOTFOUND)
+                    cell = norm.cell(col, row)
+                    norm.record_change(cell, cell.value, "notfound")
                 continue
             elif len(search_result) > 1:
-                for col in mapping_cols:
-                    self.current_norm.paint(col, row, self.current_norm.FILL_TOOMANY)
-                    self.current_norm.comment_cell(col, row, f"Found multiple: {search_result}")
                 # Mapeamos el primer hallazgo de todos modos
-            search_result = search_result[0]
-            result = mapper(row_data, search_result)
-            for i, value in enumerate(result):
-                self.current_norm[mapping_cols[i], row] = value
+                flag, comment = "toomany", f"Found multiple: {search_result}"
+            result = mapper(row_data, search_result[0])
+            for i, col in enumerate(mapping_cols):
+                value = result[i] if i < len(result) else norm[col, row]
+                norm.record_change(norm.cell(col, row), value, flag, comment)
 
     def merge_columns_into_sheet(
             self,
@@ -472,6 +1216,7 @@ class BookNormalizer:
             *,
             drop_empty_rows: bool = True,
             dedupe: bool = False,
+            max_in_memory: int = DEFAULT_MAX_IN_MEMORY,
     ):
         """
         Merge rows from multiple source column groups into a new sheet with unified column names.
@@ -486,42 +1231,89 @@ class BookNormalizer:
             new_names: output column headers, e.g. ("ColA", "ColB")
             drop_empty_rows: skip rows where all values are empty/None
             dedupe: keep only unique row-tuples across the merged result
+            max_in_memory: distinct rows kept in memory while deduping before spilling
+                to temporary files (see distinct.iter_distinct)
         """
         k = len(new_names)
         if target_sheet not in self.ws_norms:
             self.create_sheet(target_sheet)  # creates SheetNormalizer for it
-
-        # Collect merged data per output column
-        merged = {name: [] for name in new_names}
-
         for group in column_groups:
             if len(group) != k:
                 raise ValueError(f"Column group length {len(group)} != {k} (len(new_names))")
 
-            # Read all source columns (returns lists without headers)
-            cols_dict = self.sheet.get_columns(*group)  # uses column names as keys
-            # Reconstruct row-wise tuples for this group
-            rows_iter = zip(*(cols_dict[col] for col in group))
+        # Resolve source column indexes now: the appended output columns may reuse the same names
+        column_groups = [
+            [self.sheet.col_to_index(col) for col in group]
+            for group in column_groups
+        ]
+        # Stream row-wise tuples group after group, without building the source columns
+        rows = (
+            row_vals
+            for group in column_groups
+            for row_vals in self.sheet.iter_records(group, as_tuples=True)
+            if not (drop_empty_rows and all(v in (None, "") for v in row_vals))
+        )
+        if dedupe:
+            rows = iter_distinct(rows, max_in_memory=max_in_memory)
 
-            for row_vals in rows_iter:
-                if drop_empty_rows and all(v in (None, "") for v in row_vals):
-                    continue
-                for i, out_name in enumerate(new_names):
-                    merged[out_name].append(row_vals[i])
+        # Write merged rows as they arrive into new columns appended to the target sheet
+        self.ws_norms[target_sheet].write_records(rows, new_names, append=True)
 
-        if dedupe:
-            seen = set()
-            deduped = {name: [] for name in new_names}
-            for row in zip(*(merged[name] for name in new_names)):
-                if row in seen:
-                    continue
-                seen.add(row)
-                for i, name in enumerate(new_names):
-                    deduped[name].append(row[i])
-            merged = deduped
+    def profile_into_sheet(self, target_sheet: str, columns: Iterable[str] = None, top_k: int = 10,
+                           start_row: int = 2) -> Dict[str, Dict[str, Any]]:
+        """
+        Perfila columnas de la hoja actual (ver SheetNormalizer.profile) y escribe el reporte,
+        una fila por columna, en target_sheet.
+        """
+        report = self.sheet.profile(columns, top_k=top_k, start_row=start_row)
+        if target_sheet not in self.ws_norms:
+            self.create_sheet(target_sheet)
+        headers = ["Columna", "Filas", "Nulos", "Tasa nulos", "Distintos (aprox)", "Top valores",
+                   "Largo min", "Largo max", "Largo promedio", "Largos", "Tasa ruts validos",
+                   "Tasa emails validos"]
+        rows = (
+            (
+                column, st["rows"], st["nulls"], st["null_rate"], st["distinct_approx"],
+                "; ".join(f"{value} ({count})" for value, count in st["top_values"]),
+                st["length_min"], st["length_max"], st["length_mean"],
+                "; ".join(f"{label}: {count}" for label, count in st["length_histogram"].items()),
+                st["valid_rut_rate"], st["valid_email_rate"],
+            )
+            for column, st in report.items()
+        )
+        self.ws_norms[target_sheet].write_records(rows, headers)
+        return report
 
-        # Write merged columns to the target sheet
-        self.ws_norms[target_sheet].write_values(merged)
+    @contextmanager
+    def dry_run(self, file: str = None):
+        """
+        Modo dry-run para todas las hojas del libro (ver SheetNormalizer.dry_run), incluido
+        lookup_map. Entrega un unico ChangeSet que luego se puede aplicar con apply_changes.
+        """
+        changes = ChangeSet(file)
+        previous = {title: norm.changes for title, norm in self.ws_norms.items()}
+        for norm in self.ws_norms.values():
+            norm.changes = changes
+        try:
+            yield changes
+        finally:
+            for title, norm in self.ws_norms.items():
+                norm.changes = previous.get(title)
+            changes.flush()
+
+    def apply_changes(self, changes: Iterable[Change]) -> int:
+        """Aplica en una sola pasada un ChangeSet registrado en modo dry-run. Retorna la cantidad de cambios."""
+        count = 0
+        touched = set()
+        for change in changes:
+            cell = self.wb[change.sheet][change.cell]
+            self.ws_norms[change.sheet]._check_not_compact([cell.column])
+            SheetNormalizer.apply_change(cell, change)
+            touched.add(change.sheet)
+            count += 1
+        for sheet in touched:
+            self.ws_norms[sheet].recalculate_max_row()
+        return count
 
     def close_book(self):
         self.wb.close()
@@ -1,8 +1,9 @@
 from typing import Dict, List, Set, Tuple
-from difflib import SequenceMatcher
-from email_validator import validate_email, EmailNotValidError
 import re
 
+# difflib y email_validator (que arrastra dnspython e idna) se importan dentro de las funciones
+# que los usan, para que importar este modulo sea rapido cuando solo se necesitan los ruts.
+
 STRICT_RUT_PATTERN = re.compile(r'^((\d{1,3}(?:\.\d{3}){2})|(\d{7,9}))-[\dkK]$')
 LAX_RUT_PATTERN = re.compile(r'^[\d.]{7,11}-?[\dkK]$')
 
@@ -10,6 +11,7 @@ def similarity(a: str, b: str) -> float:
     """
     Retorna un valor de similitud entre dos textos, de 0 a 1.
     """
+    from difflib import SequenceMatcher
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
 def find_potential_matches(data : List[str], threshold : float = 0.8) -> Set[str]:
@@ -68,7 +70,7 @@ def calculate_dv(rut_num: str) -> str:
     else:
         return str(remainder)
 
-def validate_email_strict(email: str) -> tuple[bool, str]:
+def validate_email_strict(email: str, check_deliverability: bool = True) -> tuple[bool, str]:
     """
     Valida rigurosamente una cadena de correo electrónico para asegurar el cumplimiento 
     de los estándares de formato. El método utiliza lógica de validación externa para
@@ -77,13 +79,17 @@ def validate_email_strict(email: str) -> tuple[bool, str]:
 
     :param email: La cadena con la dirección de correo electrónico a validar.
     :type email: str
+    :param check_deliverability: Si es False, solo se valida el formato y no se consulta el DNS
+             del dominio.
+    :type check_deliverability: bool
     :return: Una tupla donde el primer elemento es un booleano que indica si el correo
              es válido, y el segundo elemento es una cadena que contiene "Ok" o el
              mensaje de error.
     :rtype: tuple[bool, str]
     """
+    from email_validator import validate_email, EmailNotValidError
     try:
-        validate_email(email)
+        validate_email(email, check_deliverability=check_deliverability)
         return True, "Ok"
     except EmailNotValidError as e:
         return False, str(e)
@@ -0,0 +1,379 @@
+"""
+Servicio local de normalizacion que mantiene en memoria los Normalizer, los mapeos cargados y
+cachés de validacion de ruts y emails, para que los scripts de corta vida no tengan que
+reconstruirlos en cada ejecucion.
+
+Se levanta con:
+    python normalizer_service.py --port 8765 [--mapping NOMBRE ARCHIVO HOJA COL_LLAVE COL_VALOR]
+
+y se consume por HTTP en localhost (ver NormalizerClient):
+    POST /text           {"values": [...], "options": {<campos de Normalizer>}}
+    POST /rut            {"values": [...], "validation_mode": "lax", "norm_mode": "standard"}
+    POST /email          {"values": [...], "check_deliverability": true}
+    POST /mapping        {"name": "...", "values": [...]}
+    POST /mappings/load  {"name": "...", "file": "...", "sheet": "...", "key_col": "...", "value_col": "..."}
+    GET  /metrics
+Todas las respuestas son JSON; los errores de parametros (o de archivos) responden 400 y los
+demas errores 500, ambos con {"error": "..."}.
+
+Las peticiones concurrentes se agrupan en micro-lotes: cada operacion tiene su propio hilo de
+trabajo, que junta lo que llega dentro de una ventana corta y procesa una sola vez cada valor
+repetido entre peticiones con los mismos parametros. Las validaciones de email con DNS corren en
+paralelo en un pool de hilos, asi que una consulta lenta no detiene a las demas operaciones.
+"""
+from __future__ import annotations
+import argparse
+import json
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Hashable, List, Tuple
+
+from text_normalizer import Normalizer
+from norm_utils import check_rut_normalize, validate_email_strict
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class NormalizerService:
+    """Estado residente del servicio: normalizadores, mapeos, cachés, micro-lotes y metricas."""
+
+    OPERATIONS = ("text", "rut", "email", "mapping")
+
+    def __init__(self, cache_size: int = 100_000, batch_window: float = 0.002, max_batch: int = 64,
+                 dns_workers: int = 16):
+        self.normalizers: Dict[Tuple, Normalizer] = {}
+        self.mappings: Dict[str, Dict] = {}
+        self._text = lru_cache(maxsize=cache_size, typed=True)(self._normalize_text)
+        self._rut = lru_cache(maxsize=cache_size)(check_rut_normalize)
+        self._email = lru_cache(maxsize=cache_size)(validate_email_strict)
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        # Las consultas DNS bloquean, asi que se reparten en un pool aparte
+        self._dns_pool = ThreadPoolExecutor(max_workers=dns_workers, thread_name_prefix="normalizer-dns")
+        self._queues: Dict[str, queue.Queue] = {op: queue.Queue() for op in self.OPERATIONS}
+        self._workers = [
+            threading.Thread(target=self._run_batches, args=(op,), name=f"normalizer-{op}", daemon=True)
+            for op in self.OPERATIONS
+        ]
+        for worker in self._workers:
+            worker.start()
+        self.started = time.monotonic()
+        self.metrics: Dict[str, Dict[str, Any]] = {
+            op: {"requests": 0, "values": 0, "errors": 0, "latencies": deque(maxlen=1000)}
+            for op in self.OPERATIONS
+        }
+        self.batches = 0
+        self.batched_requests = 0
+        # Respuestas de error por codigo HTTP
+        self.http_errors: Dict[int, int] = {}
+
+    # Operaciones
+
+    def _normalize_text(self, options_key: Tuple, text: str) -> str:
+        normalizer = self.normalizers.get(options_key)
+        if normalizer is None:
+            options = {k: list(v) if isinstance(v, tuple) else v for k, v in options_key}
+            normalizer = self.normalizers[options_key] = Normalizer(**options)
+        return normalizer.normalize(text)
+
+    def load_mapping(self, name: str, file: str, sheet: str, key_col: str, value_col: str) -> int:
+        """Carga un mapeo desde un excel (igual que BookNormalizer.load_mapping) y lo deja residente."""
+        from excel_normalizer import BookNormalizer
+        book = BookNormalizer(file)
+        try:
+            book.load_mapping(sheet, key_col, value_col, name)
+        finally:
+            book.close_book()
+        with self._lock:
+            self.mappings[name] = book.mappings[name]
+        return len(self.mappings[name])
+
+    @staticmethod
+    def _params_key(params: Dict[str, Any]) -> Tuple:
+        return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in params.items()))
+
+    def _run(self, op: str, params: Tuple, values: List[Hashable]) -> List:
+        """Procesa valores unicos de una operacion; params es la llave entregada por _params_key."""
+        kwargs = dict(params)
+        if op == "text":
+            options = kwargs.get("options", ())
+            # Valida las opciones antes de usar la caché
+            if options not in self.normalizers:
+                self._normalize_text(options, "")
+            return [self._text(options, value) for value in values]
+        if op == "rut":
+            validation_mode = kwargs.get("validation_mode", "lax")
+            norm_mode = kwargs.get("norm_mode", "standard")
+            return [list(self._rut(str(value), validation_mode, norm_mode)) for value in values]
+        if op == "email":
+            check = bool(kwargs.get("check_deliverability", True))
+            if check:
+                results = self._dns_pool.map(lambda value: self._email(str(value), True), values)
+                return [list(result) for result in results]
+            return [list(self._email(str(value), False)) for value in values]
+        if op == "mapping":
+            mapper = self.mappings.get(kwargs.get("name"))
+            if mapper is None:
+                raise ValueError(f"Unknown mapping: \"{kwargs.get('name')}\"")
+            mapped = set(mapper.values())
+            # Mismo criterio que SheetNormalizer.map_with_dict para marcar valores sin mapeo
+            return [[mapper.get(value, value), value not in mapper and value not in mapped] for value in values]
+        raise ValueError(f"Unknown operation: \"{op}\"")
+
+    # Micro-lotes
+
+    def submit(self, op: str, params: Dict[str, Any], values: List) -> List:
+        """Encola una peticion en el micro-lote actual y espera sus resultados."""
+        if op not in self.OPERATIONS:
+            raise ValueError(f"Unknown operation: \"{op}\"")
+        if op == "text" and isinstance(params.get("options"), dict):
+            params = dict(params, options=NormalizerService._params_key(params["options"]))
+        params = NormalizerService._params_key(params)
+        # Se valida aqui, para que una peticion invalida no haga fallar al resto de su micro-lote
+        if not isinstance(values, list):
+            raise TypeError("values must be a list")
+        try:
+            hash(params)
+            for value in values:
+                hash(value)
+        except TypeError as e:
+            raise TypeError(f"Parameters and values must be hashable: {e}") from None
+        future: Future = Future()
+        start = time.perf_counter()
+        self._queues[op].put((params, values, future))
+        try:
+            return future.result()
+        except Exception:
+            with self._lock:
+                self.metrics[op]["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                metrics = self.metrics[op]
+                metrics["requests"] += 1
+                metrics["values"] += len(values)
+                metrics["latencies"].append(time.perf_counter() - start)
+
+    def _run_batches(self, op: str) -> None:
+        requests = self._queues[op]
+        while True:
+            batch = [requests.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            with self._lock:
+                self.batches += 1
+                self.batched_requests += len(batch)
+            self._process(op, batch)
+
+    def _process(self, op: str, batch: List[Tuple[Tuple, List, Future]]) -> None:
+        groups: Dict[Tuple, List[Tuple[List, Future]]] = {}
+        for params, values, future in batch:
+            groups.setdefault(params, []).append((values, future))
+        for params, requests in groups.items():
+            try:
+                self._process_group(op, params, requests)
+            except Exception as e:
+                if len(requests) == 1:
+                    requests[0][1].set_exception(e)
+                    continue
+                # Se reintenta cada peticion por separado, para que el error llegue solo a quien lo causo
+                for request in requests:
+                    try:
+                        self._process_group(op, params, [request])
+                    except Exception as e:
+                        request[1].set_exception(e)
+
+    def _process_group(self, op: str, params: Tuple, requests: List[Tuple[List, Future]]) -> None:
+        # La llave incluye el tipo para no confundir 1, 1.0 y True (igual que compact_columns)
+        unique = {(value.__class__, value): value for values, _ in requests for value in values}
+        results = dict(zip(unique, self._run(op, params, list(unique.values()))))
+        for values, future in requests:
+            future.set_result([results[(value.__class__, value)] for value in values])
+
+    # Metricas
+
+    def record_http_error(self, status: int) -> None:
+        with self._lock:
+            self.http_errors[status] = self.http_errors.get(status, 0) + 1
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        ops = {}
+        for op, metrics in self.metrics.items():
+            with self._lock:
+                latencies = sorted(metrics["latencies"])
+            ops[op] = {
+                "requests": metrics["requests"],
+                "values": metrics["values"],
+                "errors": metrics["errors"],
+                "values_per_second": metrics["values"] / elapsed if elapsed else 0.0,
+                "latency_ms_p50": latencies[len(latencies) // 2] * 1000 if latencies else None,
+                "latency_ms_p95": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else None,
+            }
+        caches = {
+            name: cache.cache_info()._asdict()
+            for name, cache in (("text", self._text), ("rut", self._rut), ("email", self._email))
+        }
+        return {
+            "uptime_seconds": elapsed,
+            "operations": ops,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+            "http_errors": dict(self.http_errors),
+            "caches": caches,
+            "normalizers": len(self.normalizers),
+            "mappings": {name: len(mapper) for name, mapper in self.mappings.items()},
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "NormalizerServer"
+
+    def _send(self, status: int, data: Dict[str, Any]) -> None:
+        body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path != "/metrics":
+            self._send(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            self._send(200, self.server.service.report())
+        except Exception as e:
+            self._send_error(500, e)
+
+    def do_POST(self) -> None:
+        service = self.server.service
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/mappings/load":
+                size = service.load_mapping(payload["name"], payload["file"], payload["sheet"],
+                                            payload["key_col"], payload["value_col"])
+                self._send(200, {"name": payload["name"], "size": size})
+                return
+            op = self.path.strip("/")
+            if op not in service.OPERATIONS:
+                self._send(404, {"error": f"Unknown path: {self.path}"})
+                return
+            values = payload.pop("values", [])
+            self._send(200, {"results": service.submit(op, payload, values)})
+        except (ValueError, TypeError, KeyError, OSError) as e:
+            self._send_error(400, e)
+        except Exception as e:
+            # Errores de openpyxl, de un normalizador, etc.: el cliente recibe el error en vez de un corte
+            self._send_error(500, e)
+
+    def _send_error(self, status: int, error: Exception) -> None:
+        self.server.service.record_http_error(status)
+        self._send(status, {"error": f"{type(error).__name__}: {error}"})
+
+    def log_message(self, format: str, *args) -> None:
+        # Las metricas reemplazan el log por peticion
+        pass
+
+
+class NormalizerServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service: NormalizerService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        super().__init__((host, port), _Handler)
+        self.service = service
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_in_background(service: NormalizerService = None, host: str = DEFAULT_HOST, port: int = 0) -> NormalizerServer:
+    """
+    Levanta el servicio en un hilo y retorna el servidor (port=0 elige un puerto libre, ver
+    server.url). Se detiene con server.shutdown().
+    """
+    server = NormalizerServer(service or NormalizerService(), host, port)
+    threading.Thread(target=server.serve_forever, name="normalizer-server", daemon=True).start()
+    return server
+
+
+class NormalizerClient:
+    """Cliente minimo del servicio, usando solo la libreria estandar."""
+
+    def __init__(self, url: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout: float = 30):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: Dict[str, Any] = None) -> Dict[str, Any]:
+        data = None if payload is None else json.dumps(payload).encode("utf-8")
+        request = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def normalize_text(self, values: List[str], **options) -> List[str]:
+        return self._request("/text", {"values": values, "options": options})["results"]
+
+    def check_ruts(self, values: List[str], validation_mode: str = "lax", norm_mode: str = "standard") -> List:
+        payload = {"values": values, "validation_mode": validation_mode, "norm_mode": norm_mode}
+        return self._request("/rut", payload)["results"]
+
+    def validate_emails(self, values: List[str], check_deliverability: bool = True) -> List:
+        payload = {"values": values, "check_deliverability": check_deliverability}
+        return self._request("/email", payload)["results"]
+
+    def apply_mapping(self, name: str, values: List) -> List:
+        return self._request("/mapping", {"name": name, "values": values})["results"]
+
+    def load_mapping(self, name: str, file: str, sheet: str, key_col: str, value_col: str) -> int:
+        payload = {"name": name, "file": file, "sheet": sheet, "key_col": key_col, "value_col": value_col}
+        return self._request("/mappings/load", payload)["size"]
+
+    def metrics(self) -> Dict[str, Any]:
+        return self._request("/metrics")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servicio local de normalizacion")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=100_000)
+    parser.add_argument("--batch-window", type=float, default=0.002, help="Segundos que se esperan para armar un lote")
+    parser.add_argument("--dns-workers", type=int, default=16, help="Hilos para validar emails con DNS")
+    parser.add_argument("--mapping", nargs=5, action="append", default=[],
+                        metavar=("NAME", "FILE", "SHEET", "KEY_COL", "VALUE_COL"))
+    args = parser.parse_args()
+
+    service = NormalizerService(cache_size=args.cache_size, batch_window=args.batch_window,
+                                dns_workers=args.dns_workers)
+    for mapping in args.mapping:
+        service.load_mapping(*mapping)
+    server = NormalizerServer(service, args.host, args.port)
+    print(f"Normalizer service listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
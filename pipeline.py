@@ -0,0 +1,133 @@
+from __future__ import annotations
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List
+
+from excel_normalizer import BookNormalizer
+
+# Ejecuta el mismo trabajo sobre muchos libros en procesos separados: cada proceso carga, normaliza
+# y guarda un archivo completo y retorna sus tiempos. openpyxl parsea y serializa en Python, asi que
+# con hilos el GIL impide el traslape; con procesos cada libro corre en paralelo en su propio nucleo
+# y en memoria hay a lo mas max_workers libros a la vez.
+# Los tiempos por etapa son de CPU (time.thread_time) para que el cuello de botella no dependa de la
+# contencion entre procesos; elapsed es el tiempo real de cada archivo dentro de su proceso, que
+# crece si hay mas procesos que nucleos.
+
+STAGES = ("load", "normalize", "save")
+
+
+@dataclass
+class FileTiming:
+    file: str
+    output: str | None = None
+    seconds: Dict[str, float] = field(default_factory=dict)
+    elapsed: float = 0.0
+    error: str | None = None
+
+
+@dataclass
+class PipelineReport:
+    files: List[FileTiming]
+    wall_seconds: float
+
+    def totals(self) -> Dict[str, float]:
+        return {stage: sum(timing.seconds.get(stage, 0.0) for timing in self.files) for stage in STAGES}
+
+    @property
+    def bottleneck(self) -> str:
+        totals = self.totals()
+        return max(totals, key=totals.get)
+
+    @property
+    def errors(self) -> List[FileTiming]:
+        return [timing for timing in self.files if timing.error]
+
+    def summary(self) -> str:
+        # Para trabajo de CPU el total de CPU es lo que tardaria correr los archivos uno tras otro;
+        # dividido por el tiempo real da el paralelismo logrado (cerca de 1 con un solo nucleo)
+        totals = self.totals()
+        cpu = sum(totals.values())
+        lines = [f"{stage:<10} {seconds:8.2f} s cpu" for stage, seconds in totals.items()]
+        lines.append(f"{'wall':<10} {self.wall_seconds:8.2f} s (cpu total {cpu:.2f} s, "
+                     f"parallelism {cpu / self.wall_seconds if self.wall_seconds else 0.0:.1f}x)")
+        lines.append(f"bottleneck: {self.bottleneck}, errors: {len(self.errors)}")
+        return "\n".join(lines)
+
+
+def _run_file(job: Callable[[BookNormalizer], Any], file_name: str, output: str,
+              book_kwargs: Dict[str, Any]) -> FileTiming:
+    # Corre en el proceso trabajador; los errores quedan en el FileTiming en vez de propagarse
+    timing = FileTiming(file_name)
+    start = time.perf_counter()
+    book = None
+    stage = "load"
+    try:
+        cpu = time.thread_time()
+        book = BookNormalizer(file_name, **book_kwargs)
+        timing.seconds["load"] = time.thread_time() - cpu
+        stage = "normalize"
+        cpu = time.thread_time()
+        job(book)
+        timing.seconds["normalize"] = time.thread_time() - cpu
+        stage = "save"
+        cpu = time.thread_time()
+        timing.output = output
+        book.save(output)
+        timing.seconds["save"] = time.thread_time() - cpu
+    except Exception as e:
+        timing.seconds[stage] = time.thread_time() - cpu
+        timing.error = f"{stage}: {type(e).__name__}: {e}"
+    finally:
+        if book is not None:
+            book.close_book()
+    timing.elapsed = time.perf_counter() - start
+    return timing
+
+
+class PipelineRunner:
+    """
+    Corre job(book) sobre cada archivo, un archivo por proceso trabajador.
+    :param job: Funcion que recibe el BookNormalizer y lo modifica. Debe poder enviarse a otro
+    proceso (una funcion definida a nivel de modulo, no una lambda).
+    :param output: Carpeta de salida, o funcion archivo -> ruta de salida.
+    :param max_workers: Procesos (y libros en memoria) simultaneos; por defecto os.cpu_count().
+    :param book_kwargs: Argumentos extra para BookNormalizer (por ejemplo checkpoint_dir).
+    """
+
+    def __init__(self, job: Callable[[BookNormalizer], Any], output: str | Callable[[str], str],
+                 max_workers: int | None = None, book_kwargs: Dict[str, Any] = None):
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        try:
+            pickle.dumps(job)
+        except Exception as e:
+            raise TypeError(f"job must be picklable to run in worker processes: {e}") from None
+        self.job = job
+        self.output = output
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.book_kwargs = book_kwargs or {}
+
+    def output_for(self, file_name: str) -> str:
+        if callable(self.output):
+            return self.output(file_name)
+        return os.path.join(self.output, os.path.basename(file_name))
+
+    def run(self, files: Iterable[str]) -> PipelineReport:
+        files = list(files)
+        timings: List[FileTiming] = []
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, max(1, len(files)))) as executor:
+            futures = [
+                executor.submit(_run_file, self.job, file_name, self.output_for(file_name), self.book_kwargs)
+                for file_name in files
+            ]
+            for file_name, future in zip(files, futures):
+                try:
+                    timings.append(future.result())
+                except Exception as e:
+                    # El proceso murio o el resultado no se pudo recibir
+                    timings.append(FileTiming(file_name, error=f"worker: {type(e).__name__}: {e}"))
+        return PipelineReport(timings, time.perf_counter() - start)